@@ -0,0 +1,52 @@
+"""
+Measures the memory used by typed model instances loaded from the database.
+
+Run from the repository root:
+
+    python benchmarks/memory.py [number of rows]
+"""
+
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from testapp.models import Animal, BigCat, Feline  # noqa: E402
+
+
+def measure(label, load):
+    tracemalloc.start()
+    instances = load()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<40} {current / len(instances):8.1f} bytes/instance")
+    return instances
+
+
+def main(count):
+    call_command("migrate", verbosity=0)
+    Feline.objects.bulk_create(Feline(name=f"cat{i}") for i in range(count // 2))
+    BigCat.objects.bulk_create(BigCat(name=f"bigcat{i}") for i in range(count - count // 2))
+
+    def load_with_type_copies():
+        # What every instance used to carry: its own (uninterned) copy of the type string.
+        instances = list(Animal.objects.all())
+        for obj in instances:
+            obj.__dict__["type"] = "".join(obj._typedmodels_type)
+        return instances
+
+    print(f"Loading {count} instances")
+    measure("type stored on each instance", load_with_type_copies)
+    measure("type resolved from the class", lambda: list(Animal.objects.all()))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,71 @@
+"""
+Compares the size and speed of the compact pickling of typed model instances with Django's
+default pickling.
+
+Run from the repository root:
+
+    python benchmarks/pickling.py [number of rows]
+"""
+
+import io
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "test_settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import models  # noqa: E402
+
+from testapp.models import Animal, BigCat, Canine, Feline  # noqa: E402
+from typedmodels import pickling  # noqa: E402
+
+
+class DjangoPickler(pickle.Pickler):
+    # Pickles model instances the way Django does, bypassing TypedModel.__reduce__.
+    def reducer_override(self, obj):
+        if isinstance(obj, models.Model):
+            return models.Model.__reduce__(obj)
+        return NotImplemented
+
+
+def django_dumps(obj):
+    f = io.BytesIO()
+    DjangoPickler(f, protocol=pickle.HIGHEST_PROTOCOL).dump(obj)
+    return f.getvalue()
+
+
+def report(label, dumps, instances, number=5):
+    single = [dumps(obj) for obj in instances]
+    data = dumps(instances)
+    dump_time = timeit.timeit(lambda: dumps(instances), number=number) / number
+    load_time = timeit.timeit(lambda: pickle.loads(data), number=number) / number
+    print(
+        f"{label:<20} {sum(map(len, single)) / len(single):8.1f} bytes/instance alone, "
+        f"{len(data) / len(instances):8.1f} bytes/instance in a list, "
+        f"dumps {dump_time * 1000:8.1f} ms, loads {load_time * 1000:8.1f} ms"
+    )
+
+
+def main(count):
+    call_command("migrate", verbosity=0)
+    Animal.objects.bulk_create(
+        [Feline(name=f"cat{i}", mice_eaten=i) for i in range(count // 3)]
+        + [BigCat(name=f"bigcat{i}") for i in range(count // 3)]
+        + [Canine(name=f"dog{i}") for i in range(count - 2 * (count // 3))]
+    )
+    instances = list(Animal.objects.all())
+
+    print(f"Pickling {count} instances")
+    report("Django pickling", django_dumps, instances)
+    report("compact pickling", pickling.dumps, instances)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
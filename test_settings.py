@@ -4,7 +4,11 @@ INSTALLED_APPS = (
     "testapp",
 )
 MIDDLEWARE_CLASSES = ()
-DATABASES = {"default": {"NAME": ":memory:", "ENGINE": "django.db.backends.sqlite3"}}
+DATABASES = {
+    "default": {"NAME": ":memory:", "ENGINE": "django.db.backends.sqlite3"},
+    # for database routing tests
+    "other": {"NAME": ":memory:", "ENGINE": "django.db.backends.sqlite3"},
+}
 SECRET_KEY = "abc123"
 DEFAULT_AUTO_FIELD = "django.db.models.AutoField"
 # avoid RemovedInDjango50Warning when running tests:
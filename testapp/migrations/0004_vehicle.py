@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0003_basemodelwithindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Vehicle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('testapp.car/', 'car'), ('testapp.car/testapp.sportscar/', 'sports car'), ('testapp.truck/', 'truck')], db_index=True, max_length=255)),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Car',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.vehicle',),
+        ),
+        migrations.CreateModel(
+            name='Truck',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.vehicle',),
+        ),
+        migrations.AddField(
+            model_name='vehicle',
+            name='towed_car',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='testapp.car'),
+        ),
+        migrations.CreateModel(
+            name='SportsCar',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.car',),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0004_vehicle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='attributes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
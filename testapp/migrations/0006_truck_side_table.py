@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0005_vehicle_attributes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TruckSideTable',
+            fields=[
+                ('manual', models.TextField(blank=True, default='')),
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='testapp.vehicle')),
+            ],
+            options={
+                'verbose_name': 'truck side table',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0006_truck_side_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Shape',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('testapp.circle', 'circle'), ('testapp.polygon', 'polygon'), ('testapp.triangle', 'triangle')], db_index=True, max_length=255)),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Polygon',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.shape',),
+        ),
+    ]
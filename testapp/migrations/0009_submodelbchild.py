@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0008_submodelc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubModelBChild',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.submodelb',),
+        ),
+        migrations.AlterField(
+            model_name='basemodelwithindex',
+            name='type',
+            field=models.CharField(choices=[('testapp.submodela', 'Sub Model A'), ('testapp.submodelb', 'Sub Model B'), ('testapp.submodelbchild', 'sub model b child'), ('testapp.submodelc', 'sub model c')], db_index=True, max_length=255),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0009_submodelbchild'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Circle',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.shape',),
+        ),
+        migrations.CreateModel(
+            name='Triangle',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('testapp.polygon',),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testapp', '0010_lazy_shapes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shape',
+            name='attributes',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
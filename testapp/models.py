@@ -1,15 +1,16 @@
 from typing import ClassVar
 
-from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
+from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models import CharField, ForeignKey, PositiveIntegerField
 
+from typedmodels.contenttypes import TypedGenericForeignKey
 from typedmodels.models import TypedModel, TypedModelManager
 
 
 class UniqueIdentifier(models.Model):
-    referent = GenericForeignKey()
+    referent = TypedGenericForeignKey()
     content_type = ForeignKey(ContentType, null=True, blank=True, on_delete=models.CASCADE)
     object_id = PositiveIntegerField(null=True, blank=True)
     created = models.DateTimeField(db_index=True, auto_now_add=True)
@@ -186,3 +187,71 @@ class SubModelB(BaseModelWithIndex):
 
     class Meta(BaseModelWithIndex.Meta):
         verbose_name = "Sub Model B"
+
+
+class SubModelBChild(SubModelB):
+    pass
+
+
+class SubModelC(BaseModelWithIndex):
+    """
+    Declares an index of its own, which typedmodels_inspect should point out isn't created.
+    """
+
+    class Meta:
+        indexes = [models.Index(fields=["name"], name="submodelc_name")]
+
+
+class Vehicle(TypedModel):
+    """
+    A typed model which stores its types as paths through the class hierarchy.
+    """
+
+    _hierarchical_types = True
+    _json_storage_field = "attributes"
+
+    name = models.CharField(max_length=255)
+    attributes = models.JSONField(default=dict, blank=True)
+
+
+class Car(Vehicle):
+    pass
+
+
+class SportsCar(Car):
+    """
+    This model tests fields stored in the base model's JSONField.
+    """
+
+    _json_fields = True
+
+    top_speed = models.IntegerField(null=True)
+    first_registered = models.DateField(null=True)
+    convertible = models.BooleanField(default=False)
+
+
+class Truck(Vehicle):
+    """
+    This model tests fields stored in a side table.
+    """
+
+    _side_table_fields = ["manual"]
+
+    towed_car = models.ForeignKey(Car, null=True, on_delete=models.SET_NULL, related_name="+")
+    manual = models.TextField(blank=True, default="")
+
+
+class Shape(TypedModel):
+    """
+    A typed model with subclasses which are only imported when first needed.
+    """
+
+    _lazy_types = {"testapp.circle": "testapp.lazy_models.Circle"}
+    _json_storage_field = "attributes"
+
+    name = models.CharField(max_length=255)
+    attributes = models.JSONField(default=dict, blank=True)
+
+
+class Polygon(Shape):
+    _lazy_types = {"testapp.triangle": "testapp.lazy_models.Triangle"}
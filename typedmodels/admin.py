@@ -1,10 +1,16 @@
-from typing import TYPE_CHECKING, Generic
+from typing import TYPE_CHECKING, Any, Generic
 
 from django.contrib.admin import ModelAdmin
+from django.contrib.admin.options import IS_POPUP_VAR
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
 
-from .models import TypedModel, TypedModelT
+from .models import TypedModel, TypedModelQuerySet, TypedModelT
+from .query_cache import get_query_cache, results_key
 
 if TYPE_CHECKING:
+    from django.db.models import QuerySet
     from django.forms.forms import BaseForm
     from django.http import HttpRequest
 
@@ -12,6 +18,13 @@ if TYPE_CHECKING:
 class TypedModelAdmin(ModelAdmin, Generic[TypedModelT]):
     model: "type[TypedModelT]"
 
+    # The most results returned by searches from autocomplete widgets and raw_id_fields popups.
+    lookup_search_limit = 20
+
+    # How long (in seconds) the results of those searches are cached for. They're also
+    # invalidated by writes to rows of the searched types (see typedmodels.query_cache).
+    lookup_search_timeout = 30
+
     def get_fields(
         self,
         request: "HttpRequest",
@@ -34,3 +47,65 @@ class TypedModelAdmin(ModelAdmin, Generic[TypedModelT]):
             # new instances don't have the type attribute
             obj._typedmodels_type = form.cleaned_data["type"]  # type: ignore[misc]
         obj.save()
+
+    def get_search_results(
+        self, request: "HttpRequest", queryset: "QuerySet[TypedModelT]", search_term: str
+    ) -> "tuple[QuerySet[TypedModelT], bool]":
+        if not (search_term and self._is_lookup_request(request)):
+            return super().get_search_results(request, queryset, search_term)
+        # Keyed by the queryset's SQL, which includes the types it's restricted to (e.g. by a
+        # ForeignKey to a typed subclass).
+        key = None
+        if isinstance(queryset, TypedModelQuerySet):
+            search_fields = tuple(self.get_search_fields(request))
+            key = results_key(queryset, search_fields, search_term, self.lookup_search_limit)
+        cache = get_query_cache()
+        pks = cache.get(key) if key is not None else None
+        if pks is None:
+            pks = self._search_pks(request, queryset, search_term)
+            if key is not None:
+                cache.set(key, pks, self.lookup_search_timeout)
+        return queryset.filter(pk__in=pks), False
+
+    def _is_lookup_request(self, request: "HttpRequest") -> bool:
+        # Searches from autocomplete widgets and raw_id_fields popups.
+        resolver_match = getattr(request, "resolver_match", None)
+        return (
+            IS_POPUP_VAR in request.GET
+            or getattr(resolver_match, "url_name", None) == "autocomplete"
+        )
+
+    def _search_pks(
+        self, request: "HttpRequest", queryset: "QuerySet[TypedModelT]", search_term: str
+    ) -> list[Any]:
+        # Up to lookup_search_limit pks of matching rows, preferring rows where a search field
+        # starts with the search term (case-insensitively), which an index can find: e.g. on
+        # (type, field) with a case-insensitive collation on MySQL, or on PostgreSQL, which
+        # compares UPPER(field), on (type, UPPER(field) text_pattern_ops).
+        limit = self.lookup_search_limit
+        prefix_q = Q()
+        for field_name in self.get_search_fields(request):
+            field_name = field_name.removeprefix("^")
+            if not field_name.startswith(("=", "@")) and self._is_field_path(field_name):
+                prefix_q |= Q(**{f"{field_name}__istartswith": search_term})
+        pks: list[Any] = []
+        if prefix_q:
+            pks += queryset.filter(prefix_q).order_by().values_list("pk", flat=True)[:limit]
+        if len(pks) < limit:
+            matches, _ = super().get_search_results(request, queryset, search_term)
+            matches = matches.exclude(pk__in=pks).order_by().values_list("pk", flat=True)
+            pks += matches.distinct()[: limit - len(pks)]
+        return pks
+
+    def _is_field_path(self, field_name: str) -> bool:
+        # Whether field_name is a path of fields, without a lookup at the end.
+        opts = self.model._meta
+        for part in field_name.split(LOOKUP_SEP):
+            try:
+                field = opts.get_field(opts.pk.name if part == "pk" else part)
+            except FieldDoesNotExist:
+                return False
+            path_infos = getattr(field, "path_infos", None)
+            if path_infos:
+                opts = path_infos[-1].to_opts
+        return True
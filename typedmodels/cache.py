@@ -0,0 +1,67 @@
+"""
+Helpers shared by the type cache and the query cache.
+
+Both invalidate entries by replacing a token which is part of each entry (or its key), rather
+than finding the affected entries.
+"""
+
+import uuid
+from collections.abc import Collection
+from functools import partial
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, transaction
+
+
+class SettingCache:
+    """
+    The cache named by a setting, or a process-local in-memory cache if that isn't set.
+    """
+
+    def __init__(self, setting: str, name: str, params: dict[str, Any]) -> None:
+        self.setting = setting
+        self.name = name
+        self.params = params
+        self.local: BaseCache | None = None
+
+    def get(self) -> BaseCache:
+        alias = getattr(settings, self.setting, None)
+        if alias is not None:
+            return caches[alias]
+        if self.local is None:
+            self.local = LocMemCache(self.name, self.params)
+        return self.local
+
+    def in_use(self) -> bool:
+        """
+        Whether the cache may have entries, i.e. it's shared (the setting is set), or the local
+        cache has been used by this process. Writes only need to invalidate it if so.
+        """
+        return getattr(settings, self.setting, None) is not None or self.local is not None
+
+
+def new_token(cache: BaseCache, key: str) -> str:
+    """
+    Returns a token for a key which wasn't in the cache (e.g. after it was replaced or
+    evicted), adding it.
+    """
+    # A random token, rather than a counter, so a token which is evicted and recreated can't
+    # make stale entries valid again. add() so concurrent readers agree.
+    token = uuid.uuid4().hex
+    if not cache.add(key, token, timeout=None):
+        token = cache.get(key, token)
+    return token
+
+
+def delete_tokens(cache: BaseCache, keys: Collection[str], using: str) -> None:
+    """
+    Deletes the tokens stored under ``keys``, invalidating the entries made with them, after
+    a write to the ``using`` database.
+    """
+    cache.delete_many(keys)
+    if connections[using].in_atomic_block:
+        # Entries cached by other connections before the transaction commits are stale too.
+        transaction.on_commit(partial(cache.delete_many, keys), using=using)
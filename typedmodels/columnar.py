@@ -0,0 +1,405 @@
+"""
+Columnar export of typed querysets, to NumPy arrays or Arrow record batches.
+
+Rows are read with ``values_list()``, in chunks, so no model instances are built. Each typed
+subclass gets its own set of columns: the fields of that subclass (including those stored in a
+JSONField or side table), rather than those of every subclass sharing the table.
+
+NumPy and pyarrow aren't dependencies of django-typed-models; install them to use this module
+(e.g. ``pip install django-typed-models[numpy]`` or ``django-typed-models[arrow]``).
+"""
+
+import datetime
+import importlib
+import json
+import os
+import struct
+from collections.abc import Collection, Iterable, Iterator
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+
+from .models import ExternalFieldAttribute, JSONFieldAttribute, SideTableAttribute, TypedModel
+
+if TYPE_CHECKING:
+    from .models import TypedModelQuerySet
+
+_INTEGER_FIELDS = {
+    "AutoField",
+    "BigAutoField",
+    "SmallAutoField",
+    "IntegerField",
+    "BigIntegerField",
+    "SmallIntegerField",
+    "PositiveIntegerField",
+    "PositiveBigIntegerField",
+    "PositiveSmallIntegerField",
+}
+_STRING_FIELDS = {"CharField", "TextField", "SlugField", "EmailField", "URLField"}
+
+# The size of the header written to .npy files. It's padded to a fixed size, so it can be
+# rewritten in place once the length of the array is known.
+_NPY_HEADER_SIZE = 128
+
+
+def _require(module: str, extra: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise ImportError(
+            f"{module} is required for this export (pip install django-typed-models[{extra}])."
+        ) from e
+
+
+def _export_columns(
+    typ_cls: type[TypedModel], names: Collection[str] | None
+) -> list[tuple[Any, ExternalFieldAttribute | None]]:
+    # (field, attribute) for each column of a typed subclass: its own concrete fields besides
+    # ``type``, then its fields stored in a JSONField or side table, with their attributes. The
+    # pk is always included, so the rows can be matched up with others.
+    columns: list[tuple[Any, ExternalFieldAttribute | None]] = [
+        (field, None) for field in typ_cls._meta.concrete_fields if field.name != "type"
+    ]
+    attributes = [getattr(typ_cls, name) for name in typ_cls._typedmodels_external_fields]
+    attributes.sort(key=lambda attribute: attribute.field.creation_counter)
+    columns += [(attribute.field, attribute) for attribute in attributes]
+    if names is not None:
+        columns = [
+            (field, attribute)
+            for field, attribute in columns
+            if field.primary_key or field.name in names or field.attname in names
+        ]
+    return columns
+
+
+def _iter_chunks(
+    queryset: "TypedModelQuerySet", fields: Iterable[str] | None, chunk_size: int
+) -> Iterator[tuple[type[TypedModel], list[Any], list[tuple]]]:
+    # Yields (typed subclass, fields, columns of values) for each chunk of rows.
+    model = queryset.model
+    names = None
+    if fields is not None:
+        names = set(fields)
+        known = {
+            name
+            for typ_cls in (model.base_class or model).get_type_classes()
+            for field, _ in _export_columns(typ_cls, None)
+            for name in (field.name, field.attname)
+        }
+        unknown = sorted(names - known)
+        if unknown:
+            raise FieldDoesNotExist(f"{model.__name__} has no field named {unknown[0]!r}")
+
+    for typ_cls, qs in queryset.split_by_type().items():
+        columns = _export_columns(typ_cls, names)
+        select = [field.attname for field, attribute in columns if attribute is None]
+        side_fields: dict[type[models.Model], list[str]] = {}
+        for field, attribute in columns:
+            if isinstance(attribute, JSONFieldAttribute):
+                if attribute.storage_name not in select:
+                    select.append(attribute.storage_name)
+            elif isinstance(attribute, SideTableAttribute):
+                side_fields.setdefault(attribute.side_model, []).append(field.attname)
+        positions = {name: i for i, name in enumerate(select)}
+        pk_position = positions[typ_cls._meta.pk.attname]  # pyright: ignore[reportOptionalMemberAccess]
+
+        rows = qs.values_list(*select).iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            values = list(zip(*chunk, strict=True))
+            pks = values[pk_position]
+            side_rows = {
+                # The side rows of the chunk, with one query per side table.
+                side_model: {
+                    row[0]: dict(zip(attnames, row[1:], strict=True))
+                    for row in side_model._base_manager.using(qs.db)
+                    .filter(pk__in=pks)
+                    .values_list("pk", *attnames)
+                }
+                for side_model, attnames in side_fields.items()
+            }
+            yield (
+                typ_cls,
+                [field for field, _ in columns],
+                [
+                    _column_values(field, attribute, values, positions, pks, side_rows)
+                    for field, attribute in columns
+                ],
+            )
+
+
+def _column_values(field, attribute, values, positions, pks, side_rows) -> tuple:
+    if isinstance(attribute, JSONFieldAttribute):
+        return tuple(
+            attribute.value_from(data) for data in values[positions[attribute.storage_name]]
+        )
+    if isinstance(attribute, SideTableAttribute):
+        rows = side_rows[attribute.side_model]
+        # A missing side row has the fields' defaults, as when it's loaded by an instance.
+        return tuple(rows[pk][field.attname] if pk in rows else field.get_default() for pk in pks)
+    return values[positions[field.attname]]
+
+
+def _value_field(field: Any) -> Any:
+    # The field whose values a (possibly related) field has.
+    while field.is_relation:
+        field = field.target_field
+    return field
+
+
+def _numpy_dtype(np: Any, field: Any) -> Any:
+    value_field = _value_field(field)
+    internal_type = value_field.get_internal_type()
+    if internal_type in _INTEGER_FIELDS:
+        # NULLs become NaN, as in pandas.
+        return np.dtype("float64" if field.null else "int64")
+    if internal_type == "FloatField":
+        return np.dtype("float64")
+    if internal_type == "BooleanField" and not field.null:
+        return np.dtype("bool")
+    if internal_type == "DateField":
+        return np.dtype("datetime64[D]")
+    if internal_type == "DateTimeField":
+        return np.dtype("datetime64[us]")
+    if internal_type in _STRING_FIELDS and not field.null and value_field.max_length:
+        return np.dtype(f"U{value_field.max_length}")
+    return np.dtype("object")
+
+
+def _numpy_array(np: Any, dtype: Any, values: tuple) -> Any:
+    if dtype.kind == "O":
+        return np.fromiter(values, dtype=dtype, count=len(values))
+    if dtype.kind == "M":
+        # NumPy datetimes have no time zone, so aware datetimes are stored in UTC.
+        values = tuple(
+            timezone.make_naive(v, datetime.timezone.utc)
+            if isinstance(v, datetime.datetime) and timezone.is_aware(v)
+            else v
+            for v in values
+        )
+    return np.array(values, dtype=dtype)
+
+
+def iter_numpy_chunks(
+    queryset: "TypedModelQuerySet",
+    fields: Iterable[str] | None = None,
+    chunk_size: int = 10_000,
+) -> Iterator[tuple[type[TypedModel], dict[str, Any]]]:
+    """
+    Yields ``(typed subclass, columns)`` for each chunk of up to ``chunk_size`` rows of
+    ``queryset``, where ``columns`` maps the attnames of the subclass's fields to NumPy arrays.
+    The rows of each subclass are read with their own query.
+
+    ``fields`` restricts the columns to the given fields (and the pk). Integer columns which
+    allow NULL are float64, with NULLs as NaN. Datetimes are stored in UTC. Values without a
+    fixed-size NumPy type (e.g. nullable strings, or JSON) are kept in object arrays.
+    """
+    np = _require("numpy", "numpy")
+    for typ_cls, model_fields, columns in _iter_chunks(queryset, fields, chunk_size):
+        yield (
+            typ_cls,
+            {
+                field.attname: _numpy_array(np, _numpy_dtype(np, field), values)
+                for field, values in zip(model_fields, columns, strict=True)
+            },
+        )
+
+
+def to_numpy(
+    queryset: "TypedModelQuerySet",
+    fields: Iterable[str] | None = None,
+    chunk_size: int = 10_000,
+) -> dict[type[TypedModel], dict[str, Any]]:
+    """
+    Returns a dict mapping each typed subclass in ``queryset`` to its columns, as given by
+    ``iter_numpy_chunks()`` but with all the chunks of the subclass concatenated.
+    """
+    np = _require("numpy", "numpy")
+    chunks: dict[type[TypedModel], list[dict[str, Any]]] = {}
+    for typ_cls, columns in iter_numpy_chunks(queryset, fields, chunk_size):
+        chunks.setdefault(typ_cls, []).append(columns)
+    return {
+        typ_cls: {
+            name: np.concatenate([columns[name] for columns in cls_chunks])
+            for name in cls_chunks[0]
+        }
+        for typ_cls, cls_chunks in chunks.items()
+    }
+
+
+def _npy_header(np: Any, dtype: Any, length: int) -> bytes:
+    header = repr(
+        {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)}
+    )
+    magic = np.lib.format.magic(1, 0)
+    header_len = _NPY_HEADER_SIZE - len(magic) - 2
+    if len(header) >= header_len:
+        raise ValueError(f"Can't write a .npy file of dtype {dtype}.")
+    return magic + struct.pack("<H", header_len) + (header.ljust(header_len - 1) + "\n").encode()
+
+
+def write_npy(
+    queryset: "TypedModelQuerySet",
+    directory: str | os.PathLike[str],
+    fields: Iterable[str] | None = None,
+    chunk_size: int = 10_000,
+) -> dict[type[TypedModel], dict[str, str]]:
+    """
+    Writes each column given by ``iter_numpy_chunks()`` to a ``.npy`` file, at
+    ``<directory>/<app_label>.<model_name>/<attname>.npy``, streaming the rows in chunks.
+    Returns a dict mapping each typed subclass to a dict of its columns' paths.
+
+    The files can be memory-mapped with ``numpy.load(path, mmap_mode="r")``. Columns kept in
+    object arrays can't be, so they raise ValueError; leave them out with ``fields``.
+    """
+    np = _require("numpy", "numpy")
+    paths: dict[type[TypedModel], dict[str, str]] = {}
+    files: dict[str, Any] = {}
+    lengths: dict[str, int] = {}
+    dtypes: dict[str, Any] = {}
+    try:
+        for typ_cls, model_fields, columns in _iter_chunks(queryset, fields, chunk_size):
+            cls_paths = paths.get(typ_cls)
+            if cls_paths is None:
+                cls_directory = os.path.join(directory, typ_cls._meta.label_lower)
+                os.makedirs(cls_directory, exist_ok=True)
+                cls_paths = paths[typ_cls] = {}
+                for field in model_fields:
+                    dtype = _numpy_dtype(np, field)
+                    if dtype.kind == "O":
+                        raise ValueError(
+                            f"{typ_cls._meta.label}.{field.name} has no fixed-size NumPy type, "
+                            "so it can't be written to a .npy file."
+                        )
+                    path = cls_paths[field.attname] = os.path.join(
+                        cls_directory, f"{field.attname}.npy"
+                    )
+                    files[path] = open(path, "wb")
+                    files[path].write(_npy_header(np, dtype, 0))
+                    lengths[path] = 0
+                    dtypes[path] = dtype
+            for field, values in zip(model_fields, columns, strict=True):
+                path = cls_paths[field.attname]
+                files[path].write(_numpy_array(np, dtypes[path], values).tobytes())
+                lengths[path] += len(values)
+        for path, f in files.items():
+            f.seek(0)
+            f.write(_npy_header(np, dtypes[path], lengths[path]))
+    finally:
+        for f in files.values():
+            f.close()
+    return paths
+
+
+def _arrow_type(pa: Any, field: Any) -> Any:
+    value_field = _value_field(field)
+    internal_type = value_field.get_internal_type()
+    if internal_type in _INTEGER_FIELDS:
+        return pa.int64()
+    if internal_type == "FloatField":
+        return pa.float64()
+    if internal_type == "BooleanField":
+        return pa.bool_()
+    if internal_type == "DecimalField":
+        return pa.decimal128(value_field.max_digits, value_field.decimal_places)
+    if internal_type == "DateField":
+        return pa.date32()
+    if internal_type == "DateTimeField":
+        return pa.timestamp("us", tz="UTC" if settings.USE_TZ else None)
+    if internal_type == "DurationField":
+        return pa.duration("us")
+    if internal_type == "BinaryField":
+        return pa.binary()
+    # Strings, and anything else (e.g. JSON or UUIDs) as a string.
+    return pa.string()
+
+
+def _arrow_array(pa: Any, field: Any, arrow_type: Any, values: tuple) -> Any:
+    if arrow_type == pa.string():
+        internal_type = _value_field(field).get_internal_type()
+        if internal_type == "JSONField":
+            values = tuple(None if v is None else json.dumps(v, cls=field.encoder) for v in values)
+        elif internal_type not in _STRING_FIELDS:
+            values = tuple(None if v is None else str(v) for v in values)
+    return pa.array(values, type=arrow_type)
+
+
+def _type_dictionary(pa: Any, queryset: "TypedModelQuerySet") -> tuple[Any, dict[str, int]]:
+    # Every type of the base model, so the ``type`` columns of all the subclasses share one
+    # dictionary, and their batches can be concatenated without re-encoding.
+    model = queryset.model
+    types = sorted((model.base_class or model).get_types())
+    return pa.array(types, type=pa.string()), {typ: i for i, typ in enumerate(types)}
+
+
+def iter_record_batches(
+    queryset: "TypedModelQuerySet",
+    fields: Iterable[str] | None = None,
+    chunk_size: int = 10_000,
+) -> Iterator[tuple[type[TypedModel], Any]]:
+    """
+    Yields ``(typed subclass, pyarrow.RecordBatch)`` for each chunk of up to ``chunk_size``
+    rows of ``queryset``. Each batch has a dictionary-encoded ``type`` column, followed by a
+    column for each field of the subclass (named by attname). The batches of a subclass all
+    have the same schema.
+
+    ``fields`` restricts the columns to the given fields (and the pk and ``type``). JSON,
+    UUIDs and other values without a matching Arrow type are stored as strings.
+    """
+    pa = _require("pyarrow", "arrow")
+    dictionary, type_indices = _type_dictionary(pa, queryset)
+    schemas: dict[type[TypedModel], Any] = {}
+    for typ_cls, model_fields, columns in _iter_chunks(queryset, fields, chunk_size):
+        schema = schemas.get(typ_cls)
+        if schema is None:
+            schema = schemas[typ_cls] = pa.schema(
+                [pa.field("type", pa.dictionary(pa.int32(), pa.string()), nullable=False)]
+                + [
+                    pa.field(field.attname, _arrow_type(pa, field), nullable=field.null)
+                    for field in model_fields
+                ],
+                metadata={"typedmodels.model": typ_cls._meta.label},
+            )
+        indices = pa.array([type_indices[typ_cls._typedmodels_type]] * len(columns[0]), pa.int32())
+        arrays = [pa.DictionaryArray.from_arrays(indices, dictionary)] + [
+            _arrow_array(pa, field, schema.field(field.attname).type, values)
+            for field, values in zip(model_fields, columns, strict=True)
+        ]
+        yield typ_cls, pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_arrow(
+    queryset: "TypedModelQuerySet",
+    directory: str | os.PathLike[str],
+    fields: Iterable[str] | None = None,
+    chunk_size: int = 10_000,
+) -> dict[type[TypedModel], str]:
+    """
+    Writes the batches given by ``iter_record_batches()`` to an Arrow IPC file for each typed
+    subclass, at ``<directory>/<app_label>.<model_name>.arrow``, streaming the rows in chunks.
+    Returns a dict mapping each typed subclass to the path of its file.
+
+    The files can be read without copying with
+    ``pyarrow.ipc.open_file(pyarrow.memory_map(path)).read_all()``.
+    """
+    pa = _require("pyarrow", "arrow")
+    _require("pyarrow.ipc", "arrow")
+    os.makedirs(directory, exist_ok=True)
+    paths: dict[type[TypedModel], str] = {}
+    writers: dict[type[TypedModel], Any] = {}
+    try:
+        for typ_cls, batch in iter_record_batches(queryset, fields, chunk_size):
+            writer = writers.get(typ_cls)
+            if writer is None:
+                path = paths[typ_cls] = os.path.join(
+                    directory, f"{typ_cls._meta.label_lower}.arrow"
+                )
+                writer = writers[typ_cls] = pa.ipc.new_file(path, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return paths
@@ -0,0 +1,87 @@
+"""
+Generic relations to typed models.
+"""
+
+from collections import defaultdict
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+
+from .models import TypedModel
+
+
+def _base_model(model):
+    # Every typed subclass is stored in its base model's table.
+    if isinstance(model, type) and issubclass(model, TypedModel):
+        return model.base_class or model
+    return model
+
+
+class TypedGenericForeignKey(GenericForeignKey):
+    """
+    A ``GenericForeignKey`` which, when prefetched, loads the objects of all the typed
+    subclasses of a base model with a single query, instead of one query per content type.
+
+    Objects are matched to the typed subclass of their row, which may differ from the stored
+    content type (e.g. if the row was recast since).
+    """
+
+    def get_prefetch_querysets(self, instances, querysets=None):
+        custom_querysets = {}
+        if querysets is not None:
+            for queryset in querysets:
+                ct_id = self.get_content_type(model=queryset.query.model, using=queryset.db).pk
+                if ct_id in custom_querysets:
+                    raise ValueError("Only one queryset is allowed for each content type.")
+                custom_querysets[ct_id] = queryset
+
+        # Group the object ids by content type, and typed content types by base model too.
+        ct_attname = self.model._meta.get_field(self.ct_field).attname
+        fk_dict = defaultdict(set)
+        typed_fk_dict = defaultdict(set)
+        instance_dict = {}
+        for instance in instances:
+            ct_id = getattr(instance, ct_attname)
+            fk_val = getattr(instance, self.fk_field)
+            if ct_id is None or fk_val is None:
+                continue
+            using = instance._state.db
+            model = self.get_content_type(id=ct_id, using=using).model_class()
+            base_model = _base_model(model)
+            if base_model is not model and ct_id not in custom_querysets:
+                typed_fk_dict[(base_model, using)].add(fk_val)
+            else:
+                fk_dict[ct_id].add(fk_val)
+                instance_dict[ct_id] = instance
+
+        ret_val = []
+        for (base_model, using), fkeys in typed_fk_dict.items():
+            ret_val.extend(base_model._base_manager.using(using).filter(pk__in=fkeys))
+        for ct_id, fkeys in fk_dict.items():
+            if ct_id in custom_querysets:
+                ret_val.extend(custom_querysets[ct_id].filter(pk__in=fkeys))
+            else:
+                instance = instance_dict[ct_id]
+                ct = self.get_content_type(id=ct_id, using=instance._state.db)
+                ret_val.extend(ct.get_all_objects_for_this_type(pk__in=fkeys))
+
+        def gfk_key(obj):
+            ct_id = getattr(obj, ct_attname)
+            if ct_id is None:
+                return None
+            model = self.get_content_type(id=ct_id, using=obj._state.db).model_class()
+            if model is None:
+                # A stale content type.
+                return None
+            return (
+                model._meta.pk.get_prep_value(getattr(obj, self.fk_field)),
+                _base_model(model),
+            )
+
+        return (
+            ret_val,
+            lambda obj: (obj.pk, _base_model(obj.__class__)),
+            gfk_key,
+            True,
+            self.name,
+            False,
+        )
@@ -0,0 +1,169 @@
+"""
+Model forms and formsets for editing typed objects of mixed types.
+"""
+
+from functools import lru_cache, partial
+from typing import Any
+
+from django import forms
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.forms.models import (
+    ALL_FIELDS,
+    BaseInlineFormSet,
+    BaseModelFormSet,
+    modelform_factory,
+    modelformset_factory,
+)
+
+from .models import TypedModel
+
+
+def _sharing_formfield_callback(callback: Any = None) -> Any:
+    # Returns a formfield_callback which builds each model field's form field once, so the
+    # form classes of all the typed subclasses share them, and their widgets. Form instances
+    # still get their own copies, as usual.
+    formfields: dict[Any, forms.Field | None] = {}
+
+    def formfield_callback(db_field, **kwargs):
+        if kwargs:
+            # e.g. Meta.widgets or Meta.labels for this field.
+            return callback(db_field, **kwargs) if callback else db_field.formfield(**kwargs)
+        try:
+            return formfields[db_field]
+        except KeyError:
+            pass
+        formfield = callback(db_field) if callback else db_field.formfield()
+        if (
+            isinstance(formfield, forms.ChoiceField)
+            and db_field.name == "type"
+            and issubclass(db_field.model, TypedModel)
+        ):
+            # The choices list every type, so they're only built when rendered, rather than
+            # copied into every form.
+            include_blank = db_field.blank or not db_field.has_default()
+            formfield.choices = partial(db_field.get_choices, include_blank=include_blank)
+        formfields[db_field] = formfield
+        return formfield
+
+    formfield_callback._typedmodels_shared = True  # type: ignore[attr-defined]
+    return formfield_callback
+
+
+def _model_has_field(model: type[TypedModel], name: str) -> bool:
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def _make_form_class(model, form, fields=None, exclude=None) -> type[forms.ModelForm]:
+    callback = getattr(getattr(form, "Meta", None), "formfield_callback", None)
+    if not getattr(callback, "_typedmodels_shared", False):
+        callback = _sharing_formfield_callback(callback)
+    return modelform_factory(
+        model, form=form, fields=fields, exclude=exclude, formfield_callback=callback
+    )
+
+
+@lru_cache(maxsize=1000)
+def _cached_form_class(model, form, fields, exclude) -> type[forms.ModelForm]:
+    return _make_form_class(model, form, fields, exclude)
+
+
+def typed_modelform_factory(
+    model: type[TypedModel],
+    form: type[forms.ModelForm] = forms.ModelForm,
+    fields: Any = None,
+    exclude: Any = None,
+) -> type[forms.ModelForm]:
+    """
+    Returns a ModelForm class for the given typed model, like Django's ``modelform_factory()``.
+
+    Form classes are cached, so calling this again with the same arguments (e.g. once for each
+    row of a mixed list) returns the same class instead of building a new one.
+    """
+    if isinstance(fields, list):
+        fields = tuple(fields)
+    if isinstance(exclude, list):
+        exclude = tuple(exclude)
+    return _cached_form_class(model, form, fields, exclude)
+
+
+class BaseTypedModelFormSet(BaseModelFormSet):
+    """
+    A model formset whose forms for existing objects are built with a form class for the
+    object's typed subclass, so each form has the fields of its own subclass.
+
+    A form class is built once for each typed subclass (and cached on the formset class), from
+    the formset's ``form``. Extra forms use ``form`` itself.
+    """
+
+    # django-stubs omits underscore-prefixed formset methods from its public stubs.
+    def _construct_form(self, i, **kwargs):
+        instance = None
+        if i < self.initial_form_count():
+            # Finds the instance the same way as BaseModelFormSet._construct_form().
+            if self.is_bound:
+                pk_field = self.model._meta.pk  # pyright: ignore[reportOptionalMemberAccess]
+                try:
+                    pk = self._get_to_python(pk_field)(  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+                        self.data[f"{self.add_prefix(i)}-{pk_field.name}"]
+                    )
+                except (KeyError, ValidationError):
+                    pass
+                else:
+                    instance = self._existing_object(pk)  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+            else:
+                instance = self.get_queryset()[i]
+        if instance is not None and type(instance) is not self.model:
+            self.form = self._typed_form_class(type(instance))
+        try:
+            return super()._construct_form(i, **kwargs)  # type: ignore[misc]  # pyright: ignore[reportAttributeAccessIssue]
+        finally:
+            vars(self).pop("form", None)
+
+    def _typed_form_class(self, model: type[TypedModel]) -> type[forms.ModelForm]:
+        formset_class = type(self)
+        form_classes = vars(formset_class).get("_typedmodels_form_classes")
+        if form_classes is None:
+            form_classes = formset_class._typedmodels_form_classes = {}  # type: ignore[attr-defined]
+        key = (model, self.form)
+        try:
+            return form_classes[key]
+        except KeyError:
+            pass
+        fields = self.form._meta.fields  # pyright: ignore[reportGeneralTypeIssues]
+        if fields is not None and fields != ALL_FIELDS:
+            # Leave out the fields of other subclasses.
+            fields = [
+                name
+                for name in fields
+                if name in self.form.declared_fields or _model_has_field(model, name)
+            ]
+        form_class = form_classes[key] = _make_form_class(model, self.form, fields=fields)
+        return form_class
+
+
+class BaseTypedInlineFormSet(BaseTypedModelFormSet, BaseInlineFormSet):
+    """
+    An inline formset (e.g. for ``InlineModelAdmin.formset``) whose forms for existing objects
+    are built with a form class for the object's typed subclass.
+    """
+
+
+def typed_modelformset_factory(
+    model: type[TypedModel],
+    form: type[forms.ModelForm] = forms.ModelForm,
+    formset: type[BaseModelFormSet] = BaseTypedModelFormSet,
+    fields: Any = None,
+    exclude: Any = None,
+    **kwargs: Any,
+) -> type[BaseModelFormSet]:
+    """
+    Returns a formset class for editing objects of the given typed model and its subclasses,
+    like Django's ``modelformset_factory()``. Each existing object gets a form for its own
+    typed subclass (see ``BaseTypedModelFormSet``).
+    """
+    form = typed_modelform_factory(model, form, fields, exclude)
+    return modelformset_factory(model, form=form, formset=formset, **kwargs)
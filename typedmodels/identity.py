@@ -0,0 +1,115 @@
+"""
+An opt-in identity map for typed model instances.
+
+While one is active, loading a row that has already been loaded returns the existing instance
+instead of building a new one, however the row was queried.
+"""
+
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from django.http import HttpRequest, HttpResponse
+
+    from .models import TypedModel
+
+_Key = tuple[str | None, type, Any]
+
+_current_identity_map: "ContextVar[IdentityMap | None]" = ContextVar(
+    "typedmodels_identity_map", default=None
+)
+
+
+class IdentityMap:
+    """
+    Maps ``(database alias, base model, pk)`` to the instance loaded for that row, keeping at
+    most ``max_size`` instances (least recently used ones are dropped first).
+    """
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self.max_size = max_size
+        self._instances: OrderedDict[_Key, TypedModel] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+    def get(self, key: _Key) -> "TypedModel | None":
+        instance = self._instances.get(key)
+        if instance is not None:
+            self._instances.move_to_end(key)
+        return instance
+
+    def add(self, key: _Key, instance: "TypedModel") -> None:
+        self._instances[key] = instance
+        self._instances.move_to_end(key)
+        while len(self._instances) > self.max_size:
+            self._instances.popitem(last=False)
+
+    def discard(self, key: _Key) -> None:
+        self._instances.pop(key, None)
+
+    def discard_model(self, model: type) -> None:
+        """
+        Forgets every instance of the given base model.
+        """
+        for key in [key for key in self._instances if key[1] is model]:
+            del self._instances[key]
+
+    def clear(self) -> None:
+        self._instances.clear()
+
+
+def get_identity_map() -> IdentityMap | None:
+    """
+    Returns the active identity map, or None.
+    """
+    return _current_identity_map.get()
+
+
+@contextmanager
+def identity_map(max_size: int = 10_000) -> Iterator[IdentityMap]:
+    """
+    Activates a new identity map for the duration of the ``with`` block.
+
+    Saving an instance makes it the one returned for its row, and ``update()`` or ``delete()``
+    on a typed queryset forgets the instances of that model. Changes made in other ways (raw
+    SQL, other processes) aren't seen: a row that's loaded again keeps the attribute values of
+    the existing instance, including unsaved changes.
+    """
+    current = IdentityMap(max_size)
+    token = _current_identity_map.set(current)
+    try:
+        yield current
+    finally:
+        _current_identity_map.reset(token)
+
+
+@contextmanager
+def suspend_identity_map() -> Iterator[None]:
+    """
+    Deactivates the identity map (if any) for the duration of the ``with`` block, so rows are
+    loaded into new instances.
+    """
+    token = _current_identity_map.set(None)
+    try:
+        yield
+    finally:
+        _current_identity_map.reset(token)
+
+
+class IdentityMapMiddleware:
+    """
+    Activates an identity map for each request.
+    """
+
+    max_size = 10_000
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request: "HttpRequest") -> "HttpResponse":
+        with identity_map(self.max_size):
+            return self.get_response(request)
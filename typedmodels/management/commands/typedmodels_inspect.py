@@ -0,0 +1,285 @@
+"""
+Reports how the rows of each typed model's table are spread over its types, and points out
+layout problems.
+"""
+
+import json
+from typing import Any, cast
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import Count, Q
+
+from typedmodels.models import TypedModel
+
+
+def _table_sizes(connection, table: str) -> dict[str, int | None]:
+    """
+    Returns the on-disk size in bytes of ``table`` and of its indexes, or None for sizes the
+    backend doesn't expose.
+    """
+    if connection.vendor == "postgresql":
+        sql = "SELECT pg_table_size(%s::regclass), pg_indexes_size(%s::regclass)"
+        params = [table, table]
+    elif connection.vendor == "mysql":
+        sql = (
+            "SELECT data_length, index_length FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s"
+        )
+        params = [table]
+    elif connection.vendor == "sqlite":
+        # Needs SQLite to be compiled with the dbstat virtual table.
+        sql = (
+            "SELECT (SELECT SUM(pgsize) FROM dbstat WHERE name = %s), "
+            "(SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = %s))"
+        )
+        params = [table, table]
+    else:
+        return {"table": None, "indexes": None}
+    try:
+        # In a savepoint, so a failure doesn't break an enclosing transaction.
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        row = None
+    table_size, index_size = row or (None, None)
+    return {"table": table_size, "indexes": index_size}
+
+
+def _indexed_columns(opts) -> list[tuple[str, list[str]]]:
+    """
+    Returns ``(index name, columns)`` for the non-unique indexes on a model's table.
+    """
+    indexes = [
+        (f"{field.name} (db_index)", [field.column])
+        for field in opts.concrete_fields
+        if field.db_index and not field.unique
+    ]
+    for index in opts.indexes:
+        if index.fields:
+            columns = [opts.get_field(name.lstrip("-")).column for name in index.fields]
+            indexes.append((index.name, columns))
+    return indexes
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports the row count and per-column NULL density of each type in typed model tables, "
+        "their table and index sizes, and layout problems worth fixing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.ModelName",
+            help="Typed models to inspect. Defaults to every typed base model.",
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help='The database to inspect. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            "--sample",
+            type=int,
+            help="Only look at this many of the most recent rows (by pk) of each table.",
+        )
+        parser.add_argument(
+            "--null-threshold",
+            type=float,
+            default=0.95,
+            help="Flag subclass columns which are NULL in at least this fraction of the rows "
+            "of every type that has them. Defaults to 0.95.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Output a JSON report, e.g. for tracking over time.",
+        )
+
+    def handle(self, *args, **options):
+        if options["models"]:
+            models = []
+            for label in options["models"]:
+                try:
+                    model = apps.get_model(label)
+                except (LookupError, ValueError) as e:
+                    raise CommandError(str(e)) from e
+                if not issubclass(model, TypedModel):
+                    raise CommandError(f"{label} isn't a typed model.")
+                model = model.base_class or model
+                if model not in models:
+                    models.append(model)
+        else:
+            models = [
+                model
+                for model in apps.get_models()
+                if issubclass(model, TypedModel) and "_typedmodels_registry" in vars(model)
+            ]
+
+        reports = [
+            self.inspect_model(
+                model, options["database"], options["sample"], options["null_threshold"]
+            )
+            for model in models
+        ]
+        if options["json"]:
+            self.stdout.write(json.dumps(reports, indent=2))
+        else:
+            for report in reports:
+                self.write_report(report)
+
+    def inspect_model(
+        self, model: type[TypedModel], using: str, sample: int | None, null_threshold: float
+    ) -> dict[str, Any]:
+        opts = model._meta
+        qs = model._base_manager.using(using).order_by()
+        if sample is not None:
+            # A pk bound rather than a LIMITed subquery, which not every backend allows in IN.
+            first_pk = qs.order_by("-pk").values_list("pk", flat=True)[sample - 1 : sample].first()
+            if first_pk is not None:
+                qs = qs.filter(pk__gte=first_pk)
+
+        # A single GROUP BY type query counts the rows and the NULLs in every nullable column.
+        nullable = [field for field in opts.concrete_fields if field.null]
+        annotations: dict[str, Any] = {"rows": Count("pk")}
+        for i, field in enumerate(nullable):
+            annotations[f"nulls_{i}"] = Count("pk", filter=Q(**{f"{field.name}__isnull": True}))
+        counts = cast(list[dict[str, Any]], list(qs.values("type").annotate(**annotations)))
+        total = sum(row["rows"] for row in counts)
+
+        registry = model._typedmodels_registry
+        types: dict[str, dict[str, Any]] = {}
+        warnings: list[dict[str, Any]] = []
+        for row in sorted(counts, key=lambda row: -row["rows"]):
+            typ = row["type"]
+            typ_cls = registry.get(typ)
+            if typ_cls is None:
+                warnings.append(
+                    {
+                        "kind": "unregistered_type",
+                        "type": typ,
+                        "message": f"{row['rows']} rows have type {typ!r}, which isn't registered.",
+                    }
+                )
+            types[typ] = {
+                "class": typ_cls.__name__ if typ_cls is not None else None,
+                "rows": row["rows"],
+                "fraction": row["rows"] / total,
+                "null_fraction": {
+                    field.column: row[f"nulls_{i}"] / row["rows"]
+                    for i, field in enumerate(nullable)
+                },
+            }
+
+        warnings.extend(self.find_sparse_columns(model, types, null_threshold))
+        warnings.extend(self.find_single_type_indexes(model))
+        warnings.extend(self.find_dropped_indexes(model))
+        warnings.extend(self.find_deferred_type(model))
+
+        return {
+            "model": opts.label,
+            "table": opts.db_table,
+            "sampled": sample is not None,
+            "rows": total,
+            "size": _table_sizes(connections[using], opts.db_table),
+            "types": types,
+            "warnings": warnings,
+        }
+
+    def find_sparse_columns(self, model, types, null_threshold):
+        registry = model._typedmodels_registry
+        for name in model._meta.fields_from_subclasses:
+            field = model._meta.get_field(name)
+            if not field.concrete or not field.null:
+                continue
+            users = {
+                typ: report
+                for typ, report in types.items()
+                if (typ_cls := registry.get(typ)) is not None
+                and any(f.column == field.column for f in typ_cls._meta.concrete_fields)
+            }
+            if users and all(
+                report["null_fraction"][field.column] >= null_threshold for report in users.values()
+            ):
+                # Relations can't be stored in JSON.
+                options = (
+                    "_side_table_fields"
+                    if field.is_relation
+                    else "_json_fields or _side_table_fields"
+                )
+                yield {
+                    "kind": "sparse_column",
+                    "column": field.column,
+                    "message": f"{field.column} is almost always NULL in the rows of "
+                    f"{', '.join(sorted(users))}. Consider {options}.",
+                }
+
+    def find_single_type_indexes(self, model):
+        base_columns = {
+            model._meta.get_field(name).column for name in model._meta._typedmodels_original_fields
+        }
+        for name, columns in _indexed_columns(model._meta):
+            if any(column in base_columns for column in columns):
+                continue
+            users = [
+                typ_cls._typedmodels_type
+                for typ_cls in model._typedmodels_registry.values()
+                if {f.column for f in typ_cls._meta.concrete_fields}.issuperset(columns)
+            ]
+            if len(users) == 1:
+                yield {
+                    "kind": "single_type_index",
+                    "index": name,
+                    "columns": columns,
+                    "message": f"Index {name} is only useful to rows of type {users[0]!r}. "
+                    f"Consider a partial index with condition=Q(type={users[0]!r}).",
+                }
+
+    def find_dropped_indexes(self, model):
+        for typ_cls in model._typedmodels_registry.values():
+            for index in typ_cls._meta.dropped_indexes:
+                yield {
+                    "kind": "dropped_index",
+                    "type": typ_cls._typedmodels_type,
+                    "index": index.name or ", ".join(index.fields),
+                    "message": f"{typ_cls.__name__}.Meta.indexes isn't created, because proxy "
+                    f"models don't have indexes. Move it to {model.__name__}.Meta.indexes.",
+                }
+
+    def find_deferred_type(self, model):
+        classes = [model, *model._typedmodels_registry.values()]
+        for cls in classes:
+            for manager in cls._meta.managers:
+                names, defer = manager.get_queryset().query.deferred_loading
+                if ("type" in names) if defer else (names and "type" not in names):
+                    yield {
+                        "kind": "deferred_type",
+                        "manager": f"{cls.__name__}.{manager.name}",
+                        "message": f"{cls.__name__}.{manager.name} defers the type field, so "
+                        "every object it loads needs another query to find its class. "
+                        "Include type in .only() calls.",
+                    }
+
+    def write_report(self, report: dict[str, Any]) -> None:
+        size = report["size"]
+        self.stdout.write(
+            self.style.MIGRATE_HEADING(f"{report['model']} ({report['table']})")
+            + f": {report['rows']} rows"
+            + (" (sampled)" if report["sampled"] else "")
+        )
+        if size["table"] is not None:
+            self.stdout.write(
+                f"  table size {size['table']} bytes, index size {size['indexes']} bytes"
+            )
+        for typ, info in report["types"].items():
+            self.stdout.write(f"  {typ}: {info['rows']} rows ({info['fraction']:.1%})")
+            for column, fraction in info["null_fraction"].items():
+                if fraction:
+                    self.stdout.write(f"    {column}: {fraction:.1%} NULL")
+        for warning in report["warnings"]:
+            self.stdout.write(self.style.WARNING(f"  {warning['kind']}: {warning['message']}"))
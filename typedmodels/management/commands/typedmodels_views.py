@@ -0,0 +1,137 @@
+"""
+Writes migrations which create, and keep up to date, a database view for each typed subclass.
+"""
+
+import os
+import sys
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import migrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from typedmodels.models import TypedModel
+from typedmodels.operations import (
+    CreateTypedModelView,
+    DeleteTypedModelView,
+    get_view_definitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes a migration for each app whose typed models' per-subclass database views are "
+        "missing or out of date, creating, recreating or dropping the views."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "app_labels",
+            nargs="*",
+            metavar="app_label",
+            help="Apps to write migrations for. Defaults to every app with typed models.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Just show the operations the migrations would have.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Exit with a non-zero status if a migration is needed, without writing it.",
+        )
+        parser.add_argument("-n", "--name", help="Use this name for the migrations.")
+
+    def handle(self, *args, **options):
+        base_models = [
+            model
+            for model in apps.get_models()
+            if issubclass(model, TypedModel) and "_typedmodels_registry" in vars(model)
+        ]
+        app_labels = options["app_labels"] or sorted({m._meta.app_label for m in base_models})
+        for app_label in app_labels:
+            try:
+                apps.get_app_config(app_label)
+            except LookupError as e:
+                raise CommandError(str(e)) from e
+
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        changed = False
+        for app_label in app_labels:
+            operations = self.view_operations(
+                loader, [m for m in base_models if m._meta.app_label == app_label]
+            )
+            if not operations:
+                continue
+            changed = True
+            if options["check"] or options["dry_run"]:
+                self.stdout.write(self.style.MIGRATE_HEADING(app_label))
+                for operation in operations:
+                    self.stdout.write(f"  - {operation.describe()}")
+            else:
+                self.write_migration(loader, app_label, operations, options["name"])
+        if not changed:
+            self.stdout.write("No changes to typed model views.")
+        elif options["check"]:
+            sys.exit(1)
+
+    def recorded_views(self, loader, app_label):
+        """
+        Returns the views created by the app's migrations, as a dict mapping each view name to
+        the operation which created it.
+        """
+        leaves = loader.graph.leaf_nodes(app_label)
+        if len(leaves) > 1:
+            raise CommandError(
+                f"Conflicting migrations in {app_label}; run makemigrations --merge first."
+            )
+        views = {}
+        for node in loader.graph.forwards_plan(leaves[0]) if leaves else []:
+            if node[0] != app_label:
+                continue
+            for operation in loader.graph.nodes[node].operations:
+                if isinstance(operation, CreateTypedModelView):
+                    views[operation.name] = operation
+                elif isinstance(operation, DeleteTypedModelView):
+                    views.pop(operation.name, None)
+        return views
+
+    def view_operations(self, loader, base_models):
+        if not base_models:
+            return []
+        recorded = self.recorded_views(loader, base_models[0]._meta.app_label)
+        wanted = {}
+        for model in base_models:
+            for name, definition in get_view_definitions(model).items():
+                wanted[name] = CreateTypedModelView(model.__name__, name, **definition)
+        deletes = []
+        creates = []
+        for name, operation in recorded.items():
+            if name not in wanted or wanted[name].deconstruct() != operation.deconstruct():
+                deletes.append(DeleteTypedModelView(**operation.deconstruct()[2]))
+        for name, operation in wanted.items():
+            if name not in recorded or recorded[name].deconstruct() != operation.deconstruct():
+                creates.append(operation)
+        return deletes + creates
+
+    def write_migration(self, loader, app_label, operations, name):
+        leaves = loader.graph.leaf_nodes(app_label)
+        if leaves:
+            number = (MigrationAutodetector.parse_number(leaves[0][1]) or 0) + 1
+        else:
+            number = 1
+        # As makemigrations --merge builds its migrations.
+        migration_cls = type(
+            "Migration",
+            (migrations.Migration,),
+            {"dependencies": leaves, "operations": operations},
+        )
+        migration = migration_cls(f"{number:04d}_{name or 'typed_views'}", app_label)
+        writer = MigrationWriter(migration)
+        os.makedirs(os.path.dirname(writer.path), exist_ok=True)
+        with open(writer.path, "w", encoding="utf-8") as f:
+            f.write(writer.as_string())
+        self.stdout.write(f"Wrote {writer.path}")
@@ -1,25 +1,65 @@
 import builtins
+import heapq
+import itertools
+import operator
+import sys
 import types
 import typing
-from functools import partial
+from collections import Counter, defaultdict
+from collections.abc import Collection, Iterable, Iterator
+from contextlib import nullcontext
+from functools import cache, lru_cache, partial
 from typing import Any, ClassVar, TypeVar, cast
 
-from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.apps import apps as global_apps
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.exceptions import NON_FIELD_ERRORS, FieldDoesNotExist, FieldError, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.serializers.python import Serializer as _PythonSerializer
 from django.core.serializers.xml_serializer import Serializer as _XmlSerializer
-from django.db import models
-from django.db.models.base import DEFERRED, ModelBase  # type: ignore
+from django.core.signals import setting_changed
+from django.db import NotSupportedError, connection, connections, models, router, transaction
+from django.db.migrations.state import ProjectState
+from django.db.models import Avg, Count, ForeignObjectRel, Max, Min, Q, Sum
+from django.db.models.base import DEFERRED, ModelBase, ModelState  # type: ignore
+from django.db.models.deletion import DO_NOTHING, Collector, get_candidate_relations_to_delete
 from django.db.models.fields import Field
 from django.db.models.fields.related import RelatedField
 from django.db.models.options import Options, make_immutable_fields_list
+from django.db.models.query import (
+    FlatValuesListIterable,
+    ModelIterable,
+    ValuesIterable,
+)
+from django.db.models.query_utils import DeferredAttribute
+from django.db.models.sql import Query
+from django.dispatch import receiver
 from django.utils.encoding import smart_str
+from django.utils.module_loading import import_string
+from django.utils.text import camel_case_to_spaces
 from typing_extensions import Self
 
+from .cache import new_token
+from .identity import get_identity_map, suspend_identity_map
+from .query_cache import get_query_cache, invalidate_types, query_cache_in_use, results_key
+from .signals import (
+    _connect_new_subclass,
+    _send_per_class,
+    post_bulk_create,
+    post_bulk_update,
+    post_type_change,
+)
+from .type_cache import (
+    forget_type,
+    forget_types,
+    generation_key,
+    get_type_cache,
+    type_cache_key,
+)
+
 if typing.TYPE_CHECKING:
-    from django.db.models import Model, QuerySet
+    from django.db.models import Model
 else:
-    from django_stubs_ext import QuerySetAny as QuerySet
-
     reveal_type = print
 
 
@@ -27,20 +67,1201 @@ T = TypeVar("T", bound="TypedModel", covariant=True)
 TypedModelT = TypeVar("TypedModelT", bound="TypedModel")
 
 
+class TwoPhaseModelIterable(ModelIterable):
+    """
+    Yields model instances like ``ModelIterable``, but only selects the columns of the
+    queryset's model, then loads the columns of the typed subclasses of the rows with one query
+    per subclass (see ``TypedModelQuerySet.two_phase()``).
+    """
+
+    def __iter__(self):
+        queryset = self.queryset
+        model = cast("builtins.type[TypedModel]", queryset.model)
+        query = queryset.query
+        if query.deferred_loading != (frozenset(), True) or query.select_related:
+            # Columns were picked by only()/defer() (or are needed by select_related()).
+            yield from ModelIterable(queryset, self.chunked_fetch, self.chunk_size)
+            return
+        base_fields = model._meta.concrete_fields
+        if model.base_class is None:
+            base_fields = [
+                f for f in base_fields if f.name not in model._meta.fields_from_subclasses
+            ]
+        phase_one = queryset.only(*[f.name for f in base_fields])
+        phase_one._iterable_class = ModelIterable
+        objs = iter(ModelIterable(phase_one, self.chunked_fetch, self.chunk_size))
+        loaded = {f.attname for f in base_fields}
+        # With iterator(), the subclass columns of each chunk are loaded before it's yielded.
+        batch_size = self.chunk_size if self.chunked_fetch else None
+        while batch := list(itertools.islice(objs, batch_size)):
+            _load_subclass_columns(batch, loaded)
+            yield from batch
+
+
+def _row_getter(iterable_class: type, selected: list[str] | None, names: list[str]):
+    # Returns a function which gets the value named by one of `names` from a row yielded by
+    # an iterable_class, which selects `selected` (or model instances, if that's None).
+    if selected is None:
+        return operator.attrgetter(names[0])
+    for name in names:
+        if name in selected:
+            if issubclass(iterable_class, ValuesIterable):
+                return operator.itemgetter(name)
+            if issubclass(iterable_class, FlatValuesListIterable):
+                return lambda value: value
+            return operator.itemgetter(selected.index(name))
+    return None
+
+
+def _merge_key(getters: list, null_rank: int, row: Any) -> tuple:
+    # Sorts NULLs first or last, as the database does.
+    return tuple(
+        (null_rank, None) if value is None else (0, value)
+        for value in (getter(row) for getter in getters)
+    )
+
+
+@cache
+def _routed_databases(model: "builtins.type[TypedModel]", for_write: bool) -> list[str] | None:
+    # Only routers which opt in (with a `typedmodels_fan_out` attribute) spread typed models'
+    # querysets over several databases. Their routes are cached, per class, until the
+    # database settings change.
+    if not any(getattr(r, "typedmodels_fan_out", False) for r in router.routers):
+        return None
+    route = router.db_for_write if for_write else router.db_for_read
+    get_type_classes = getattr(model, "_get_type_classes", None)
+    if get_type_classes is None:
+        return None
+    databases = sorted({route(typ_cls) for typ_cls in get_type_classes()})
+    if not databases or databases == [route(model)]:
+        return None
+    return databases
+
+
+@receiver(setting_changed)
+def _clear_routed_databases(*, setting: str, **kwargs) -> None:
+    if setting in ("DATABASE_ROUTERS", "TYPEDMODELS_DATABASES"):
+        _routed_databases.cache_clear()
+
+
+def _load_subclass_columns(objs: "list[TypedModel]", loaded: set[str]) -> None:
+    by_class: dict[tuple[str | None, builtins.type[TypedModel]], list[TypedModel]] = defaultdict(
+        list
+    )
+    for obj in objs:
+        by_class[obj._state.db, obj.__class__].append(obj)
+    for (using, cls), cls_objs in by_class.items():
+        attnames = [f.attname for f in cls._meta.concrete_fields if f.attname not in loaded]
+        # Instances from the identity map may have them already.
+        pks = [obj.pk for obj in cls_objs if any(a not in vars(obj) for a in attnames)]
+        if not pks:
+            continue
+        using = using or router.db_for_read(cls)
+        max_params = connections[using].features.max_query_params or 2000
+        rows: dict[Any, tuple] = {}
+        for start in range(0, len(pks), max_params):
+            qs = (
+                (cls.base_class or cls)
+                ._base_manager.using(using)
+                .filter(pk__in=pks[start : start + max_params])
+            )
+            rows.update((row[0], row[1:]) for row in qs.values_list("pk", *attnames))
+        for obj in cls_objs:
+            row = rows.get(obj.pk)
+            if row is not None:
+                obj._load_missing_values(dict(zip(attnames, row, strict=True)), None)
+
+
+def _rollup_kind(alias: str, aggregate: Any) -> type:
+    # The kind of aggregate, for rolling its results up the class hierarchy.
+    for kind in (Sum, Count, Min, Max, Avg):
+        if isinstance(aggregate, kind):
+            if getattr(aggregate, "distinct", False) and kind not in (Min, Max):
+                raise ValueError(
+                    f"aggregate_by_type() can't combine the {alias!r} aggregate, because it's "
+                    "distinct."
+                )
+            return kind
+    raise ValueError(
+        f"aggregate_by_type() can't combine the {alias!r} aggregate. Use Sum, Count, Min, Max "
+        "or Avg."
+    )
+
+
+def _combine(aggregate: Any, total: Any, value: Any) -> Any:
+    # Combines the value of an aggregate over one group of rows into its total over others.
+    if total is None:
+        return value
+    if value is None:
+        return total
+    if isinstance(aggregate, Min):
+        return min(total, value)
+    if isinstance(aggregate, Max):
+        return max(total, value)
+    return total + value
+
+
+class TypedModelQuerySet(models.QuerySet[T]):
+    model: "builtins.type[T]"
+
+    _typedmodels_load_side_tables = False
+    _typedmodels_cached = False
+    _typedmodels_cache_timeout: Any = DEFAULT_TIMEOUT
+
+    def _clone(self) -> Self:
+        # django-stubs omits underscore-prefixed QuerySet methods from its public stubs.
+        clone = super()._clone()  # type: ignore[misc]  # pyright: ignore[reportAttributeAccessIssue]
+        clone._typedmodels_load_side_tables = self._typedmodels_load_side_tables
+        clone._typedmodels_cached = self._typedmodels_cached
+        clone._typedmodels_cache_timeout = self._typedmodels_cache_timeout
+        return clone
+
+    def _fetch_all(self) -> None:
+        fetched = self._result_cache is None
+        key = results_key(self) if fetched and self._typedmodels_cached else None
+        if key is not None:
+            results = get_query_cache().get(key)
+            if results is not None:
+                self._result_cache = results
+                self._prefetch_done = True
+                return
+        self._fetch_results(fetched)
+        if key is not None:
+            get_query_cache().set(key, self._result_cache, self._typedmodels_cache_timeout)
+
+    def _fetch_results(self, fetched: bool) -> None:
+        databases = self._typedmodels_databases() if fetched else None
+        if databases:
+            self._result_cache = list(self._fan_out(databases, use_chunked_fetch=False))
+            if self._prefetch_related_lookups and not self._prefetch_done:  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+                self._prefetch_related_objects()  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        else:
+            super()._fetch_all()  # type: ignore[misc]  # pyright: ignore[reportAttributeAccessIssue]
+        if fetched and self._typedmodels_load_side_tables and self._result_cache:
+            by_database: dict[str, list[TypedModel]] = defaultdict(list)
+            for obj in self._result_cache:
+                if isinstance(obj, TypedModel):
+                    by_database[obj._state.db or self.db].append(obj)
+            for using, instances in by_database.items():
+                _load_side_rows(instances, using)
+
+    def _typedmodels_databases(self, for_write: bool = False) -> list[str] | None:
+        """
+        Returns the databases which the database routers send this queryset's typed subclasses
+        to, or None if that's just the database this queryset would use anyway.
+        """
+        if self._db is not None or self._hints:  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+            return None
+        return _routed_databases(self.model, for_write)
+
+    def _fan_out(
+        self, databases: list[str], use_chunked_fetch: bool, chunk_size: int | None = None
+    ) -> Iterator[Any]:
+        # Runs this query on each database, and merges the results in the queryset's order if
+        # that can be done in Python, or else chains them.
+        low_mark, high_mark = self.query.low_mark, self.query.high_mark
+        iterators = []
+        for using in databases:
+            qs = self.using(using)
+            # Each database's first high_mark rows hold all the rows of the merged slice.
+            qs.query.clear_limits()
+            qs.query.set_limits(high=high_mark)
+            chunked = use_chunked_fetch and not connections[using].settings_dict.get(
+                "DISABLE_SERVER_SIDE_CURSORS"
+            )
+            iterators.append(qs._iterator(chunked, chunk_size))  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        key, reverse = self._fan_out_order(databases[0])
+        if key is None:
+            rows: Iterator[Any] = itertools.chain.from_iterable(iterators)
+        else:
+            rows = heapq.merge(*iterators, key=key, reverse=reverse)
+        return itertools.islice(rows, low_mark, high_mark)
+
+    def _fan_out_order(self, using: str):
+        # Returns a sort key and direction matching the queryset's ordering, or (None, False)
+        # if it's unordered. Raises NotSupportedError if the ordering can't be reproduced in
+        # Python, rather than returning rows out of order.
+        query = self.query
+        ordering = query.order_by or (
+            (self.model._meta.ordering or ()) if query.default_ordering else ()
+        )
+        if (not ordering and not query.extra_order_by) or "?" in ordering:
+            return None, False
+        iterable_class = self._iterable_class  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        if issubclass(iterable_class, ModelIterable):
+            selected = None
+        else:
+            # The names of the values in each row, as Django's values iterables have them.
+            values_select = list(query.values_select) or [
+                f.attname for f in self.model._meta.concrete_fields
+            ]
+            selected = [*query.extra_select, *values_select, *query.annotation_select]
+        getters = []
+        directions = set()
+        for item in [] if query.extra_order_by else ordering:
+            if not isinstance(item, str):
+                break
+            name = item.lstrip("-")
+            names = [name]
+            if name not in query.annotations:
+                try:
+                    field = cast(
+                        Field,
+                        self.model._meta.get_field(
+                            self.model._meta.pk.name if name == "pk" else name
+                        ),
+                    )
+                except FieldDoesNotExist:
+                    break
+                if not field.concrete or (field.is_relation and name != field.attname):
+                    # Ordering by a relation orders by the related model's ordering.
+                    break
+                names = [field.attname, field.name]
+            getter = _row_getter(iterable_class, selected, names)
+            if getter is None:
+                break
+            getters.append(getter)
+            directions.add(item.startswith("-"))
+        else:
+            if len(directions) == 1:
+                descending = directions.pop() != (not query.standard_ordering)
+                null_rank = 1 if connections[using].features.nulls_order_largest else -1
+                return partial(_merge_key, getters, null_rank), descending
+        raise NotSupportedError(
+            f"Can't merge {self.model.__name__} rows from several databases in the order "
+            f"{', '.join(map(str, ordering or query.extra_order_by))}. Order by concrete fields "
+            "(selected, with values()/values_list()) in one direction, or query each "
+            "database with .using()."
+        )
+
+    def iterator(self, chunk_size: int | None = None) -> Iterator[T]:
+        databases = self._typedmodels_databases()
+        if databases:
+            return self._fan_out(databases, use_chunked_fetch=True, chunk_size=chunk_size)
+        return super().iterator(chunk_size=chunk_size)
+
+    def count(self) -> int:
+        databases = self._typedmodels_databases() if self._result_cache is None else None
+        if not databases:
+            return super().count()
+        total = 0
+        for using in databases:
+            qs = self.using(using)
+            qs.query.clear_limits()
+            total += qs.count()
+        # Apply the slice to the total.
+        low_mark, high_mark = self.query.low_mark, self.query.high_mark
+        total = max(total - low_mark, 0)
+        if high_mark is not None:
+            total = min(total, high_mark - low_mark)
+        return total
+
+    def exists(self) -> bool:
+        databases = self._typedmodels_databases() if self._result_cache is None else None
+        if not databases or self.query.is_sliced:
+            return super().exists()
+        return any(self.using(using).exists() for using in databases)
+
+    def aggregate(self, *args, **kwargs) -> dict[str, Any]:
+        if self._typedmodels_databases():
+            raise NotSupportedError(
+                f"Can't aggregate {self.model.__name__} rows spread over several databases. "
+                "Aggregate each database's rows separately with .using()."
+            )
+        return super().aggregate(*args, **kwargs)
+
+    def update(self, **kwargs) -> int:
+        databases = self._typedmodels_databases(for_write=True)
+        if databases:
+            return sum(self.using(using).update(**kwargs) for using in databases)
+        _forget_identities(self.model)
+        if "type" in kwargs:
+            try:
+                return self._update_rows(kwargs)
+            finally:
+                # Done afterwards, so the old types can't be cached again in between.
+                forget_types(self.model.base_class or self.model, self.db)
+        return self._update_rows(kwargs)
+
+    def _update_rows(self, kwargs: dict[str, Any]) -> int:
+        if query_cache_in_use():
+            types = set(self.model.get_types())
+            if isinstance(kwargs.get("type"), str):
+                types.add(kwargs["type"])
+            _invalidate_cached_results(self.model, types, self.db)
+        if not post_type_change.receivers or not isinstance(kwargs.get("type"), str):
+            return super().update(**kwargs)
+        registry = self.model._typedmodels_registry
+        new_class = registry.get(kwargs["type"])
+        if new_class is None:
+            return super().update(**kwargs)
+        # Find the previous type of each row, to send post_type_change once per type.
+        pks_by_type: dict[str, list[Any]] = defaultdict(list)
+        for pk, typ in self.order_by().values_list("pk", "type"):
+            pks_by_type[typ].append(pk)
+        updated = super().update(**kwargs)
+        for typ, pks in pks_by_type.items():
+            old_class = registry.get(typ)
+            if old_class is not None and old_class is not new_class:
+                post_type_change.send(sender=old_class, new_class=new_class, pks=pks, using=self.db)
+        return updated
+
+    def delete(self) -> tuple[int, dict[str, int]]:
+        databases = self._typedmodels_databases(for_write=True)
+        if databases:
+            total = 0
+            per_model: Counter[str] = Counter()
+            for using in databases:
+                deleted, deleted_per_model = self.using(using).delete()
+                total += deleted
+                per_model.update(deleted_per_model)
+            return total, dict(per_model)
+        _forget_identities(self.model)
+        try:
+            return self._delete_rows()
+        finally:
+            forget_types(self.model.base_class or self.model, self.db)
+
+    def _delete_rows(self) -> tuple[int, dict[str, int]]:
+        if query_cache_in_use():
+            _invalidate_cached_results(self.model, self.model.get_types(), self.db)
+        query = self.query
+        if query.combinator or query.is_sliced or query.distinct_fields or self._fields is not None:  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+            # Let Django raise its errors.
+            return super().delete()
+
+        del_query = self._chain()  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        del_query._for_write = True
+        del_query.query.select_for_update = False
+        del_query.query.select_related = False
+        del_query.query.clear_ordering(force=True)
+        if del_query._can_raw_delete():
+            deleted = del_query._raw_delete(del_query.db)
+            self._result_cache = None
+            return deleted, ({self.model._meta.label: deleted} if deleted else {})
+        collector = _TypedCollector(using=del_query.db, origin=self)
+        collector.collect(del_query)
+        deleted, deleted_per_model = collector.delete()
+        self._result_cache = None
+        return deleted, deleted_per_model
+
+    def _can_raw_delete(self) -> bool:
+        # Whether deleting this queryset's rows cascades to nothing and sends no signals, so
+        # they can be deleted with one DELETE statement. Unlike Django's Collector, relations
+        # which only rows of other types than those being deleted can have are ignored.
+        base_class = self.model.base_class or self.model
+        opts = base_class._meta
+        if opts.parents or any(hasattr(f, "bulk_related_objects") for f in opts.private_fields):
+            return False
+        relations = [
+            rel
+            for rel in cast(Iterable[ForeignObjectRel], get_candidate_relations_to_delete(opts))
+            if rel.field.remote_field.on_delete is not DO_NOTHING
+        ]
+        if not relations and not _has_delete_listeners(self.model):
+            return True
+        registry = base_class._typedmodels_registry
+        classes = []
+        for typ in self.order_by().values_list("type", flat=True).distinct():
+            typ_cls = registry.get(typ)
+            if typ_cls is None:
+                return False
+            classes.append(typ_cls)
+        if any(
+            _has_delete_listeners(typ_cls, subclasses=False) for typ_cls in [self.model, *classes]
+        ):
+            return False
+        for rel in relations:
+            owner = _relation_owner(rel)
+            if owner is None or any(issubclass(typ_cls, owner) for typ_cls in classes):
+                return False
+        return True
+
+    def _by_write_database(self, objs: Iterable[T]) -> "dict[str, list[T]] | None":
+        # Groups objs by the database each one is routed to, if they aren't all routed to the
+        # database this queryset would write to anyway.
+        if self._db is not None or not router.routers:  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+            return None
+        by_database = defaultdict(list)
+        for obj in objs:
+            by_database[router.db_for_write(obj.__class__, instance=obj)].append(obj)
+        if list(by_database) in ([], [self.db]):
+            return None
+        return by_database
+
+    def bulk_create(self, objs, *args, **kwargs) -> list[T]:  # pyright: ignore[reportIncompatibleMethodOverride]
+        objs = list(objs)
+        by_database = self._by_write_database(objs)
+        if by_database is None:
+            if query_cache_in_use():
+                _invalidate_cached_results(self.model, {obj.type for obj in objs}, self.db)
+            created = super().bulk_create(objs, *args, **kwargs)
+            _send_per_class(post_bulk_create, created, using=self.db)
+            return created
+        for using, database_objs in by_database.items():
+            self.using(using).bulk_create(database_objs, *args, **kwargs)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs) -> int:  # pyright: ignore[reportIncompatibleMethodOverride]
+        objs = list(objs)
+        by_database = self._by_write_database(objs)
+        if by_database is None:
+            if query_cache_in_use():
+                types = {obj.type for obj in objs}
+                if "type" in fields:
+                    # The rows' previous types aren't known.
+                    types.update(self.model.get_types())
+                _invalidate_cached_results(self.model, types, self.db)
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+            _send_per_class(post_bulk_update, objs, fields=fields, using=self.db)
+            return updated
+        return sum(
+            self.using(using).bulk_update(database_objs, fields, *args, **kwargs)
+            for using, database_objs in by_database.items()
+        )
+
+    def with_side_tables(self) -> Self:
+        """
+        Returns a queryset which loads the side tables (see ``TypedModel._side_table_fields``)
+        of its results with one query per side table, rather than one query per instance when
+        a side table field is first accessed. This doesn't apply to ``iterator()``.
+        """
+        clone = self._chain()  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        clone._typedmodels_load_side_tables = True
+        return clone
+
+    def two_phase(self) -> Self:
+        """
+        Returns a queryset which loads its results in two phases: first only the columns of
+        this queryset's model, then the columns of each typed subclass of the rows, with one
+        query per subclass (per ``chunk_size`` rows, with ``iterator()``).
+
+        This avoids selecting every subclass's columns for every row, which for a wide
+        hierarchy is mostly NULLs. It doesn't apply if the queryset has ``only()``,
+        ``defer()`` or ``select_related()``.
+        """
+        clone = self._chain()  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        clone._iterable_class = TwoPhaseModelIterable
+        return clone
+
+    def cached(self, timeout: Any = DEFAULT_TIMEOUT) -> Self:
+        """
+        Returns a queryset whose results are cached (see ``typedmodels.query_cache``) for
+        ``timeout`` seconds, or the cache's default timeout.
+
+        Cached results are invalidated by saving, deleting, bulk creating or updating, or
+        changing the type of rows of any type this queryset can contain, through the ORM.
+        Changes to other tables (e.g. rows loaded by ``select_related()`` or
+        ``prefetch_related()``) don't invalidate them.
+        """
+        clone = self._chain()  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+        clone._typedmodels_cached = True
+        clone._typedmodels_cache_timeout = timeout
+        return clone
+
+    def split_by_type(self) -> "dict[builtins.type[T], TypedModelQuerySet[T]]":
+        """
+        Returns a dict mapping each typed subclass present in this queryset to a queryset
+        containing only the rows of that type.
+
+        The types present are found with a single DISTINCT query over the (indexed) ``type``
+        column. Each returned queryset only selects the columns used by its subclass, unless
+        this queryset already has deferred or restricted columns via ``.defer()``/``.only()``.
+        """
+        registry = self.model._typedmodels_registry
+        present = self.order_by().values_list("type", flat=True).distinct()
+        prune_columns = self.query.deferred_loading == (frozenset(), True)
+        routed = self._typedmodels_databases() is not None
+
+        querysets: dict[builtins.type[T], TypedModelQuerySet[T]] = {}
+        for typ in sorted(set(present)):
+            try:
+                typ_cls = cast("builtins.type[T]", registry[typ])
+            except KeyError:
+                raise ValueError(f"Invalid {self.model.__name__} identifier: {typ!r}") from None
+            qs = self.filter(type=typ)
+            if routed:
+                # The rows of a single type are all in one database.
+                qs = qs.using(router.db_for_read(typ_cls))
+            if prune_columns:
+                qs = qs.only(*[f.name for f in typ_cls._meta.concrete_fields])
+            querysets[typ_cls] = qs
+        return querysets
+
+    def aggregate_by_type(self, **aggregates: Any) -> "dict[builtins.type[T], dict[str, Any]]":
+        """
+        Computes the given aggregates for each typed subclass with rows in this queryset, and
+        for each of its typed superclasses up to this queryset's model, over the rows of the
+        class and its subclasses. Returns a dict mapping each of those classes to a dict of
+        the aggregate values, like ``aggregate()`` returns.
+
+        A single query groups the rows by ``type``, and the results are rolled up the class
+        hierarchy, so only aggregates which can be combined are supported: ``Sum``, ``Count``,
+        ``Min``, ``Max`` and ``Avg`` (computed from a sum and a count), without
+        ``distinct=True`` except for ``Min`` and ``Max``.
+        """
+        annotations: dict[str, Any] = {}
+        for alias, aggregate in aggregates.items():
+            kind = _rollup_kind(alias, aggregate)
+            if kind is Avg:
+                expression = aggregate.source_expressions[0]
+                annotations[f"_rollup_{alias}_sum"] = Sum(expression, filter=aggregate.filter)
+                annotations[f"_rollup_{alias}_count"] = Count(expression, filter=aggregate.filter)
+            else:
+                annotations[alias] = aggregate
+
+        registry = self.model._typedmodels_registry
+        by_class: dict[builtins.type[T], dict[str, Any]] = {}
+        for row in self.order_by().values("type").annotate(**annotations):
+            typ = row.pop("type")
+            try:
+                typ_cls = cast("builtins.type[T]", registry[typ])
+            except KeyError:
+                raise ValueError(f"Invalid {self.model.__name__} identifier: {typ!r}") from None
+            # Each of the class's typed superclasses (up to this queryset's model) gets the rows.
+            for klass in typ_cls.__mro__:
+                if isinstance(klass, type) and issubclass(klass, self.model):
+                    totals = by_class.setdefault(klass, {})
+                    for name, value in row.items():
+                        totals[name] = _combine(annotations[name], totals.get(name), value)
+
+        results: dict[builtins.type[T], dict[str, Any]] = {}
+        for klass in sorted(by_class, key=lambda klass: getattr(klass, "_typedmodels_type", "")):
+            totals = by_class[klass]
+            results[klass] = values = {}
+            for alias, aggregate in aggregates.items():
+                if alias in totals:
+                    values[alias] = totals[alias]
+                else:
+                    count = totals[f"_rollup_{alias}_count"]
+                    values[alias] = (
+                        totals[f"_rollup_{alias}_sum"] / count if count else aggregate.default
+                    )
+        return results
+
+    def typed_raw(
+        self,
+        raw_query: str,
+        params: Any = (),
+        translations: dict[str, str] | None = None,
+        using: str | None = None,
+        chunk_size: int = 2000,
+    ) -> Iterator[T]:
+        """
+        Runs a raw SQL query which selects rows of this model's table (e.g. from a view, or a
+        query with CTEs or window functions), and yields an instance of the typed subclass of
+        each row, like ``raw()``. The query must select the primary key and ``type`` columns.
+
+        Rows are fetched ``chunk_size`` at a time (with a server-side cursor where the database
+        supports them), so memory use doesn't grow with the number of rows. Which column holds
+        which field of each subclass is worked out once for each set of columns and cached.
+        Other columns are set as attributes, and fields which aren't selected are deferred.
+        """
+        using = using or self.db
+        connection = connections[using]
+        base_class = self.model.base_class or self.model
+        identity_map = get_identity_map()
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(raw_query, params)
+            columns = tuple(
+                (translations or {}).get(column[0], column[0]) for column in cursor.description
+            )
+            plan = _raw_plan(base_class, connection.introspection.identifier_converter, columns)
+            compiler = connection.ops.compiler("SQLCompiler")(Query(base_class), connection, using)
+            rows: Iterator[Any] = itertools.chain.from_iterable(
+                # As Django's compiler does; e.g. MySQLdb returns () rather than [].
+                iter(
+                    partial(cursor.fetchmany, chunk_size),
+                    connection.features.empty_fetchmany_value,
+                )
+            )
+            converters = compiler.get_converters(
+                [f.get_col(base_class._meta.db_table) if f else None for f in plan.fields]  # type: ignore[misc]  # pyright: ignore[reportArgumentType]
+            )
+            if converters:
+                rows = compiler.apply_converters(rows, converters)
+
+            registry = base_class._typedmodels_registry
+            positions: dict[str, tuple[Any, list[int | None]]] = {}
+            for row in rows:
+                if identity_map is not None:
+                    # from_db() looks up and adds to the identity map.
+                    new = base_class.from_db(
+                        using, plan.attnames, [row[i] for i in plan.field_positions]
+                    )
+                else:
+                    type_value = row[plan.type_position]
+                    try:
+                        target_cls, target_positions = positions[type_value]
+                    except KeyError:
+                        try:
+                            target_cls = registry[type_value]
+                        except KeyError:
+                            raise ValueError(
+                                f"Invalid {base_class.__name__} identifier: {type_value!r}"
+                            ) from None
+                        target_positions = plan.positions_for(target_cls)
+                        positions[type_value] = target_cls, target_positions
+                    new = target_cls(
+                        *[DEFERRED if i is None else row[i] for i in target_positions],
+                        _typedmodels_do_recast=False,
+                    )
+                    new._state.adding = False
+                    new._state.db = using
+                    if type_value != target_cls._typedmodels_type:
+                        # An alias; saving will store the current value.
+                        new.type = target_cls._typedmodels_type
+                for name, i in plan.annotations:
+                    setattr(new, name, row[i])
+                yield cast(T, new)
+
+
 class TypedModelManager(models.Manager[T]):
-    def get_queryset(self) -> QuerySet[T]:
-        qs = super().get_queryset()
+    _queryset_class = TypedModelQuerySet
+
+    def get_queryset(self) -> TypedModelQuerySet[T]:
+        qs = cast(TypedModelQuerySet[T], super().get_queryset())
         return self._filter_by_type(qs)
 
-    def _filter_by_type(self, qs: QuerySet[T]) -> QuerySet[T]:
+    def split_by_type(self) -> "dict[builtins.type[T], TypedModelQuerySet[T]]":
+        return self.get_queryset().split_by_type()
+
+    def with_side_tables(self) -> TypedModelQuerySet[T]:
+        return self.get_queryset().with_side_tables()
+
+    def typed_raw(self, raw_query: str, *args: Any, **kwargs: Any) -> Iterator[T]:
+        return self.get_queryset().typed_raw(raw_query, *args, **kwargs)
+
+    def aggregate_by_type(self, **aggregates: Any) -> "dict[builtins.type[T], dict[str, Any]]":
+        return self.get_queryset().aggregate_by_type(**aggregates)
+
+    def cached(self, timeout: Any = DEFAULT_TIMEOUT) -> TypedModelQuerySet[T]:
+        return self.get_queryset().cached(timeout)
+
+    def two_phase(self) -> TypedModelQuerySet[T]:
+        return self.get_queryset().two_phase()
+
+    def get_type_for(self, pk: Any) -> "builtins.type[T]":
+        """
+        Returns the typed subclass of the row with the given pk, without loading the row.
+
+        Raises ``DoesNotExist`` if there's no such row of this manager's model (or subclasses).
+        """
+        pk = self.model._meta.pk.to_python(pk)
+        try:
+            return self.get_types_for([pk])[pk]
+        except KeyError:
+            raise self.model.DoesNotExist(
+                f"{self.model._meta.object_name} matching query does not exist."
+            ) from None
+
+    def get_types_for(self, pks: Iterable[Any]) -> "dict[Any, builtins.type[T]]":
+        """
+        Returns a dict mapping each of the given pks to the typed subclass of its row. Rows
+        which don't exist, or aren't of this manager's model (or subclasses), are left out.
+
+        Types are cached (see ``typedmodels.type_cache``), so only uncached pks are queried.
+        """
+        model = self.model
+        base_class = model.base_class or model
+        using = self.db
+        to_python = model._meta.pk.to_python
+        keys = {type_cache_key(base_class, using, pk): pk for pk in map(to_python, pks)}
+
+        cache = get_type_cache()
+        # Entries are (generation, type); those from before the last bulk change are stale.
+        gen_key = generation_key(base_class, using)
+        cached = cache.get_many([*keys, gen_key])
+        generation = cached.pop(gen_key, None) or new_token(cache, gen_key)
+        types = {keys[key]: entry[1] for key, entry in cached.items() if entry[0] == generation}
+        missing = [pk for pk in keys.values() if pk not in types]
+        if missing:
+            max_params = connections[using].features.max_query_params or 2000
+            loaded: dict[Any, str] = {}
+            for start in range(0, len(missing), max_params):
+                qs = base_class._base_manager.using(using).filter(
+                    pk__in=missing[start : start + max_params]
+                )
+                loaded.update(qs.values_list("pk", "type"))
+            cache.set_many(
+                {
+                    type_cache_key(base_class, using, pk): (generation, typ)
+                    for pk, typ in loaded.items()
+                }
+            )
+            types.update(loaded)
+
+        registry = base_class._typedmodels_registry
+        result: dict[Any, builtins.type[T]] = {}
+        for pk, typ in types.items():
+            try:
+                typ_cls = registry[typ]
+            except KeyError:
+                raise ValueError(f"Invalid {model.__name__} identifier: {typ!r}") from None
+            if issubclass(typ_cls, model):
+                result[pk] = cast("builtins.type[T]", typ_cls)
+        return result
+
+    def _filter_by_type(self, qs: TypedModelQuerySet[T]) -> TypedModelQuerySet[T]:
         if hasattr(self.model, "_typedmodels_type"):
             if self.model._typedmodels_subtypes and len(self.model._typedmodels_subtypes) > 1:
-                qs = qs.filter(type__in=self.model._typedmodels_subtypes)
+                condition = Q(**_subtypes_lookup(self.model))
             else:
-                qs = qs.filter(type=self.model._typedmodels_type)
+                condition = Q(type=self.model._typedmodels_type)
+            aliases = _type_aliases_of(self.model)
+            if aliases:
+                # Rows which still have an old type (e.g. while it's being renamed).
+                condition |= Q(type__in=aliases)
+            qs = qs.filter(condition)
         return qs
 
 
+class _RawPlan:
+    """
+    Which columns of a raw query's results hold which fields of the base model.
+    """
+
+    def __init__(self, base_class: "builtins.type[TypedModel]", converter, columns) -> None:
+        fields_by_column = {converter(f.column): f for f in base_class._meta.concrete_fields}
+        self.fields: list[Field | None] = [fields_by_column.get(column) for column in columns]
+        positions = {f.attname: i for i, f in enumerate(self.fields) if f is not None}
+        self.field_positions = list(positions.values())
+        self.attnames = list(positions)
+        self.annotations = [
+            (column, i) for i, column in enumerate(columns) if self.fields[i] is None
+        ]
+        if base_class._meta.pk.attname not in positions:
+            raise FieldDoesNotExist("Raw query must include the primary key")
+        if "type" not in positions:
+            raise FieldDoesNotExist("Raw query must include the type column")
+        self.type_position = positions["type"]
+        self._positions = positions
+        self._positions_by_class: dict[builtins.type[TypedModel], list[int | None]] = {}
+
+    def positions_for(self, model_cls: "builtins.type[TypedModel]") -> list[int | None]:
+        # The position of each of model_cls's concrete fields, or None if it wasn't selected.
+        try:
+            return self._positions_by_class[model_cls]
+        except KeyError:
+            positions = [self._positions.get(f.attname) for f in model_cls._meta.concrete_fields]
+            self._positions_by_class[model_cls] = positions
+            return positions
+
+
+@lru_cache(maxsize=1000)
+def _raw_plan(base_class: "builtins.type[TypedModel]", converter, columns: tuple[str, ...]):
+    return _RawPlan(base_class, converter, columns)
+
+
+def _forget_identities(model_cls: "builtins.type[TypedModel]") -> None:
+    identity_map = get_identity_map()
+    if identity_map is not None:
+        identity_map.discard_model(model_cls.base_class or model_cls)
+
+
+def _has_delete_listeners(
+    model_cls: "builtins.type[models.Model]", subclasses: bool = True
+) -> bool:
+    # Whether deleting rows of model_cls (or, if `subclasses`, of its typed subclasses) sends
+    # signals to anything.
+    classes = [model_cls]
+    if (
+        subclasses
+        and issubclass(model_cls, TypedModel)
+        and hasattr(model_cls, "_typedmodels_registry")
+    ):
+        classes += model_cls.get_type_classes()
+    return any(
+        models.signals.pre_delete.has_listeners(cls)
+        or models.signals.post_delete.has_listeners(cls)
+        for cls in classes
+    )
+
+
+def _relation_owner(rel) -> "tuple[builtins.type[TypedModel], ...] | None":
+    """
+    Returns the typed subclasses whose rows can be referred to by ``rel`` (a reverse relation
+    to a typed model), or None if any row of the model can be.
+    """
+    model = rel.model
+    if not (isinstance(model, type) and issubclass(model, TypedModel)):
+        return None
+    base_class = model.base_class or model
+    opts = base_class._meta
+    try:
+        owners = opts._typedmodels_relation_owners
+    except AttributeError:
+        owners = opts._typedmodels_relation_owners = {}
+    try:
+        return owners[rel.field]
+    except KeyError:
+        pass
+
+    owner: tuple[builtins.type[TypedModel], ...] | None = None if model is base_class else (model,)
+    side_table_of = tuple(
+        typ_cls
+        for typ_cls in base_class._typedmodels_registry.values()
+        if typ_cls._meta.side_table_model is rel.related_model
+    )
+    if side_table_of:
+        # Side table rows only exist for rows of the subclass with the side table.
+        owner = side_table_of
+    for m2m in opts.many_to_many:
+        if m2m.remote_field.through is rel.related_model and rel.field.name == m2m.m2m_field_name():  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+            # The through table rows of a many-to-many field declared by typed subclasses
+            # only refer to rows of those subclasses.
+            declared_by = tuple(
+                typ_cls
+                for typ_cls in base_class._typedmodels_registry.values()
+                if m2m.name in typ_cls._meta.declared_fields
+            )
+            owner = declared_by or owner
+    owners[rel.field] = owner
+    return owner
+
+
+class _TypedCollector(Collector):
+    """
+    A Collector which groups deleted typed instances by type, so signals are sent with each
+    instance's class as the sender, and only looks for objects related to them through
+    relations that their types have.
+    """
+
+    def add(self, objs, source=None, nullable=False, reverse_dependency=False):
+        by_class = defaultdict(list)
+        for obj in objs:
+            by_class[obj.__class__].append(obj)
+        new_objs = []
+        for class_objs in by_class.values():
+            new_objs += super().add(class_objs, source, nullable, reverse_dependency)  # pyright: ignore[reportArgumentType]
+        return new_objs
+
+    def _has_signal_listeners(self, model):
+        # Rows of typed subclasses are deleted with their own class as the sender.
+        return _has_delete_listeners(model)
+
+    def related_objects(self, related_model, related_fields, objs):
+        owners = [(field, _relation_owner(field.remote_field)) for field in related_fields]
+        if all(owner is None for _, owner in owners):
+            return super().related_objects(related_model, related_fields, objs)
+        related_objs = [
+            obj
+            for obj in objs
+            if any(owner is None or isinstance(obj, owner) for _, owner in owners)
+        ]
+        if not related_objs:
+            return related_model._base_manager.using(self.using).none()
+        related_fields = [
+            field
+            for field, owner in owners
+            if owner is None or any(isinstance(obj, owner) for obj in related_objs)
+        ]
+        return super().related_objects(related_model, related_fields, related_objs)  # pyright: ignore[reportArgumentType]
+
+
+def _invalidate_cached_results(
+    model_cls: "builtins.type[TypedModel]", types: Iterable[str | None], using: str
+) -> None:
+    base_class = model_cls.base_class or model_cls
+    invalidate_types(base_class, {typ for typ in types if typ}, using)
+
+
+def _subtypes_lookup(model_cls: "builtins.type[TypedModel]") -> dict[str, Any]:
+    """
+    Returns filter() kwargs which match ``model_cls`` and all of its typed subclasses.
+    """
+    typ = model_cls._typedmodels_type
+    if model_cls._hierarchical_types:
+        # Every type in the subtree starts with `typ`, which ends with a "/". A prefix match
+        # (LIKE 'typ%') doesn't depend on the column's collation, unlike a range would, and
+        # can use the type index (on PostgreSQL, the "_like" index Django adds for it).
+        return {"type__startswith": typ}
+    return {"type__in": model_cls._typedmodels_subtypes}
+
+
+def _type_aliases_of(model_cls: "builtins.type[TypedModel]") -> list[str]:
+    """
+    Returns the old type values in the base model's ``_type_aliases`` which stand for
+    ``model_cls`` or one of its typed subclasses.
+    """
+    base_class = model_cls.base_class or model_cls
+    if not base_class._type_aliases:
+        return []
+    aliases = base_class._typedmodels_registry.aliases
+    subtypes = model_cls._typedmodels_subtypes
+    return sorted(
+        old_type
+        for old_type, new_type in base_class._type_aliases.items()
+        if aliases.get(new_type, new_type) in subtypes
+    )
+
+
+class TypeRegistry(dict[str, "builtins.type[TypedModel]"]):
+    """
+    Maps the ``type`` values of a typed base model to its typed subclasses.
+
+    Classes can also be looked up by an alias, such as their short ``app_label.model_name``
+    when hierarchical types are in use. Aliases aren't included when iterating.
+
+    Types declared in ``_lazy_types`` are in ``lazy`` until their class is imported, which
+    looking them up does. They aren't included when iterating either.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.aliases: dict[str, str] = {}
+        # Maps each lazy type to the dotted path of its class, and the class declaring it.
+        self.lazy: dict[str, tuple[str, builtins.type[TypedModel]]] = {}
+
+    def __missing__(self, key: str) -> "builtins.type[TypedModel]":
+        if key in self.lazy:
+            path = self.lazy[key][0]
+            # Defining the class registers it.
+            import_string(path)
+            if key not in self:
+                raise ValueError(f"{path} isn't a typed model of type {key!r}.")
+            return self[key]
+        try:
+            return self[self.aliases[key]]
+        except KeyError:
+            raise KeyError(key) from None
+
+    def import_lazy(self) -> None:
+        """
+        Imports the classes of all the lazy types.
+        """
+        for typ in list(self.lazy):
+            self[typ]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class TypeDescriptor(DeferredAttribute):
+    """
+    Descriptor for the ``type`` field of typed models.
+
+    Instances of a typed subclass don't store their own copy of the type string; it's resolved
+    from the class (``_typedmodels_type``), so all instances of a subclass share one interned
+    value. A per-instance value is only stored once ``type`` is set to something else (e.g.
+    before a ``recast()``), or on instances of the untyped base class.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        data = instance.__dict__
+        if "type" not in data and "_typedmodels_type_deferred" not in data:
+            typ = getattr(instance.__class__, "_typedmodels_type", None)
+            if typ is not None:
+                return typ
+        return super().__get__(instance, cls)
+
+    def __set__(self, instance, value):
+        data = instance.__dict__
+        if data.pop("_typedmodels_type_deferred", False):
+            # Loaded by DeferredAttribute.__get__, which expects to find it in __dict__.
+            data["type"] = value
+        elif value and value == getattr(instance.__class__, "_typedmodels_type", None):
+            data.pop("type", None)
+        else:
+            data["type"] = value
+
+
+class ExternalFieldAttribute(property):
+    """
+    Base class for attributes exposing a field declared on a typed subclass which isn't
+    stored in a column of the shared table.
+
+    These are ``property`` instances so that Django accepts them as keyword arguments when
+    constructing models.
+    """
+
+    def __init__(self, field: Field) -> None:
+        super().__init__()
+        self.field = field
+
+
+class JSONFieldAttribute(ExternalFieldAttribute):
+    """
+    Exposes a field whose value is stored as a key in the base model's JSONField (see
+    ``TypedModel._json_storage_field``).
+
+    Values are converted with the field's ``to_python()`` when set and when read, and missing
+    keys read as the field's default.
+    """
+
+    def __init__(self, field: Field, storage_name: str) -> None:
+        super().__init__(field)
+        self.storage_name = storage_name
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        return self.value_from(getattr(instance, self.storage_name))
+
+    def value_from(self, data: dict | None) -> Any:
+        """
+        Returns the value of the field in the given contents of the JSONField.
+        """
+        try:
+            value = (data or {})[self.field.name]
+        except KeyError:
+            return self.field.get_default()
+        return self.field.to_python(value)
+
+    def __set__(self, instance, value) -> None:
+        data = getattr(instance, self.storage_name)
+        if data is None:
+            data = {}
+            setattr(instance, self.storage_name, data)
+        if value is not None:
+            try:
+                value = self.field.to_python(value)
+            except ValidationError:
+                # Stored as-is; clean_fields() (and so full_clean()) reports it.
+                pass
+            if not isinstance(value, str | int | float | list | dict):
+                # Dates, Decimals, UUIDs etc. are stored as strings; to_python() parses them.
+                value = _json_encoder.default(value)
+        data[self.field.name] = value
+
+
+_json_encoder = DjangoJSONEncoder()
+
+
+class SideTableAttribute(ExternalFieldAttribute):
+    """
+    Exposes a field whose value is stored in a one-to-one side table (see
+    ``TypedModel._side_table_fields``).
+
+    The side table row is loaded on first access (or up front, by
+    ``TypedModelQuerySet.with_side_tables()``), and saved along with the instance if any of
+    its fields were set.
+    """
+
+    def __init__(self, field: Field, side_model: "builtins.type[models.Model]") -> None:
+        super().__init__(field)
+        self.side_model = side_model
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        return getattr(_get_side_row(instance, self.side_model), self.field.attname)
+
+    def __set__(self, instance, value) -> None:
+        row = _get_side_row(instance, self.side_model)
+        setattr(row, self.field.attname, value)
+        vars(instance).setdefault("_typedmodels_dirty_side_rows", set()).add(
+            self.side_model._meta.label
+        )
+
+
+def _get_side_row(instance: "TypedModel", side_model: "builtins.type[models.Model]"):
+    # Keyed by label rather than class, so instances stay picklable (the generated side table
+    # models aren't importable from their module).
+    rows = vars(instance).setdefault("_typedmodels_side_rows", {})
+    try:
+        return rows[side_model._meta.label]
+    except KeyError:
+        pass
+    row = None
+    if not instance._state.adding and instance.pk is not None:
+        row = side_model._base_manager.using(instance._state.db).filter(pk=instance.pk).first()
+    if row is None:
+        # Not saved yet, or saved before these fields existed; this has the fields' defaults.
+        row = side_model(pk=instance.pk)
+    rows[side_model._meta.label] = row
+    return row
+
+
+def _load_side_rows(instances: "list[TypedModel]", using: str) -> None:
+    side_models_by_class: dict[builtins.type[TypedModel], list[builtins.type[models.Model]]] = {}
+    pks_by_side_model: dict[builtins.type[models.Model], list] = {}
+    for instance in instances:
+        cls = instance.__class__
+        try:
+            side_models = side_models_by_class[cls]
+        except KeyError:
+            side_models = side_models_by_class[cls] = [
+                side_model
+                for klass in cls.__mro__
+                if issubclass(klass, TypedModel)
+                and (side_model := getattr(klass._meta, "side_table_model", None))
+            ]
+        for side_model in side_models:
+            pks_by_side_model.setdefault(side_model, []).append(instance.pk)
+
+    for side_model, pks in pks_by_side_model.items():
+        rows = side_model._base_manager.using(using).in_bulk(pks)
+        for instance in instances:
+            if side_model in side_models_by_class[instance.__class__]:
+                row = rows.get(instance.pk) or side_model(pk=instance.pk)
+                side_rows = vars(instance).setdefault("_typedmodels_side_rows", {})
+                side_rows[side_model._meta.label] = row
+
+
+def _make_side_model(model_cls: "builtins.type[TypedModel]", fields: dict[str, Field]):
+    """
+    Creates the side table model for the given ``_side_table_fields`` of a typed subclass.
+    """
+    base_class = model_cls.base_class
+    assert base_class is not None
+    opts = model_cls._meta
+
+    class Meta:
+        app_label = opts.app_label
+        verbose_name = f"{opts.verbose_name} side table"
+
+    attrs: dict[str, Any] = {
+        "__module__": model_cls.__module__,
+        "Meta": Meta,
+        "owner": models.OneToOneField(
+            base_class,
+            primary_key=True,
+            on_delete=models.CASCADE,
+            related_name="+",
+        ),
+        **fields,
+    }
+    return type(f"{model_cls.__name__}SideTable", (models.Model,), attrs)
+
+
+def _add_type_choice(base_class: "builtins.type[TypedModel]", typ: str, name: Any) -> None:
+    type_field = cast(models.CharField, base_class._meta.get_field("type"))
+    choices = [choice for choice in type_field.choices or () if choice[0] != typ]
+    type_field.choices = sorted([*choices, (typ, name)])
+
+
+def _declare_lazy_types(
+    cls: "builtins.type[TypedModel]",
+    base_class: "builtins.type[TypedModel]",
+    lazy_types: dict[str, str] | None,
+) -> None:
+    # Registers the types in a class's _lazy_types, so they're valid type values of its rows
+    # (and those of its typed superclasses) before their classes are imported.
+    if not lazy_types:
+        return
+    registry = base_class._typedmodels_registry
+    for typ, path in lazy_types.items():
+        typ = sys.intern(typ)
+        if typ in registry or typ in registry.lazy:
+            raise ValueError(f"Can't declare lazy type {typ!r} of {cls.__name__}, it's taken.")
+        registry.lazy[typ] = (path, cls)
+        if base_class._hierarchical_types:
+            short_typ = typ.rstrip("/").rpartition("/")[2]
+            if short_typ != typ:
+                registry.aliases[short_typ] = typ
+        for superclass in cls.__mro__:
+            subtypes = vars(superclass).get("_typedmodels_subtypes")
+            if subtypes is not None and typ not in subtypes:
+                subtypes.append(typ)
+        _add_type_choice(base_class, typ, camel_case_to_spaces(path.rpartition(".")[2]))
+
+
 class TypedModelMetaclass(ModelBase):
     """
     This metaclass enables a model for auto-downcasting using a ``type`` attribute.
@@ -60,6 +1281,8 @@ class TypedModelMetaclass(ModelBase):
             # We have to set this attribute after _meta has been created, otherwise an
             # exception would be thrown by Options class constructor.
             typed_model._meta.fields_from_subclasses = {}
+            typed_model._meta.json_fields = {}
+            typed_model._meta.side_table_model = None
             return typed_model
 
         # look for a non-proxy base class that is a subclass of TypedModel
@@ -95,6 +1318,14 @@ class TypedModelMetaclass(ModelBase):
                 )
             Meta.proxy = True
 
+            # Indexes declared on the subclass itself are dropped below; remember them so
+            # typedmodels_inspect can point them out.
+            dropped_indexes = [
+                index
+                for index in vars(Meta).get("indexes", ())
+                if index not in base_class._meta.indexes
+            ]
+
             # Proxy models shouldn't define their own indexes - they share the base model's table and indexes.
             # If we don't clear this, Django will complain that the index fields aren't local to the proxy model.
             # See issue #58
@@ -109,6 +1340,49 @@ class TypedModelMetaclass(ModelBase):
                 if isinstance(element, Field)
             )
 
+            # Fields stored as keys in the base model's JSON column, rather than as columns
+            # of their own, are replaced by descriptors instead of being added to the base.
+            json_fields = {}
+            json_field_names = classdict.get("_json_fields")
+            if json_field_names:
+                storage_name = base_class._json_storage_field
+                if not storage_name:
+                    raise FieldError(
+                        f"{classname} has _json_fields, but {base_class.__name__} doesn't have "
+                        "_json_storage_field set to the name of a JSONField."
+                    )
+                if json_field_names is True:
+                    json_field_names = [
+                        name for name, field in declared_fields.items() if not field.is_relation
+                    ]
+                for field_name in json_field_names:
+                    try:
+                        field = declared_fields.pop(field_name)
+                    except KeyError:
+                        raise FieldError(
+                            f"{classname}._json_fields refers to {field_name!r}, which isn't a "
+                            f"field declared on {classname}."
+                        ) from None
+                    if field.is_relation:
+                        raise FieldError(
+                            f"{classname}.{field_name} is a relation, so can't be stored in JSON."
+                        )
+                    field.set_attributes_from_name(field_name)
+                    json_fields[field_name] = field
+                    classdict[field_name] = JSONFieldAttribute(field, storage_name)
+
+            # Fields stored in a side table are added to it once this class exists.
+            side_table_fields = {}
+            for field_name in classdict.get("_side_table_fields", ()):
+                try:
+                    side_table_fields[field_name] = declared_fields.pop(field_name)
+                except KeyError:
+                    raise FieldError(
+                        f"{classname}._side_table_fields refers to {field_name!r}, which isn't a "
+                        f"field declared on {classname}."
+                    ) from None
+                del classdict[field_name]
+
             for field_name, field in list(declared_fields.items()):
                 # We need fields defined on subclasses to either:
                 #  * be a ManyToManyField
@@ -146,9 +1420,7 @@ class TypedModelMetaclass(ModelBase):
                         # Normalise limit_choices_to into a dict so we can add our type filter.
                         if not isinstance(remote_field.limit_choices_to, dict):
                             remote_field.limit_choices_to = {}
-                        remote_field.limit_choices_to["type__in"] = (
-                            related_model._typedmodels_subtypes
-                        )
+                        remote_field.limit_choices_to.update(_subtypes_lookup(related_model))
 
                 # Check if a field with this name has already been added to class
                 try:
@@ -189,26 +1461,70 @@ class TypedModelMetaclass(ModelBase):
         )
 
         cls._meta.fields_from_subclasses = {}
+        cls._meta.json_fields = {}
+        cls._meta.side_table_model = None
 
         if base_class:
             opts = cls._meta
 
             model_name = opts.model_name
-            typ = f"{opts.app_label}.{model_name}"
+            short_typ = typ = f"{opts.app_label}.{model_name}"
+            if base_class._hierarchical_types:
+                # Prefix the type with the type of the nearest typed superclass, e.g.
+                # "myapp.feline/myapp.bigcat/", so a subtree can be filtered by prefix.
+                parent_typ = next(
+                    (
+                        superclass._typedmodels_type
+                        for superclass in cls.__mro__[1:]
+                        if issubclass(superclass, base_class)
+                        and hasattr(superclass, "_typedmodels_type")
+                    ),
+                    "",
+                )
+                typ = f"{parent_typ}{short_typ}/"
+            typ = sys.intern(typ)
             cls._typedmodels_type = typ
             cls._typedmodels_subtypes = [typ]
-            if typ in base_class._typedmodels_registry:
+            registry = base_class._typedmodels_registry
+            if typ in registry:
                 raise ValueError(
-                    f"Can't register type {typ!r} to {classname!r} (already registered to {base_class._typedmodels_registry[typ].__name__!r})"
+                    f"Can't register type {typ!r} to {classname!r} (already registered to {registry[typ].__name__!r})"
                 )
-            base_class._typedmodels_registry[typ] = cls
+            if typ in registry.lazy:
+                declared_by = registry.lazy.pop(typ)[1]
+                if not issubclass(cls, declared_by):
+                    raise ValueError(
+                        f"{classname} is declared in {declared_by.__name__}._lazy_types, but "
+                        f"isn't a subclass of {declared_by.__name__}."
+                    )
+                if declared_fields or side_table_fields:
+                    # The base model's fields and the migrations mustn't depend on whether it's
+                    # been imported yet.
+                    raise FieldError(
+                        f"{classname} is declared in {declared_by.__name__}._lazy_types, so it "
+                        "can't add fields to the shared table or a side table. Use _json_fields "
+                        "instead."
+                    )
+            registry[typ] = cls
+            if short_typ != typ:
+                registry.aliases[short_typ] = typ
 
             type_name = getattr(cls._meta, "verbose_name", cls.__name__)
-            type_field = cast(models.CharField, base_class._meta.get_field("type"))
-            choices = (*(type_field.choices or ()), (typ, type_name))
-            type_field.choices = sorted(choices)
+            _add_type_choice(base_class, typ, type_name)
 
             cls._meta.declared_fields = declared_fields
+            cls._meta.dropped_indexes = dropped_indexes
+            cls._meta.json_fields = json_fields
+
+            external_fields = set(json_fields)
+            if side_table_fields:
+                side_model = _make_side_model(cls, side_table_fields)
+                cls._meta.side_table_model = side_model
+                for field_name in side_table_fields:
+                    field = side_model._meta.get_field(field_name)
+                    setattr(cls, field_name, SideTableAttribute(cast(Field, field), side_model))
+                external_fields.update(side_table_fields)
+            cls._typedmodels_external_fields = cls._typedmodels_external_fields | external_fields
 
             # look for any other proxy superclasses, they'll need to know
             # about this subclass
@@ -218,13 +1534,21 @@ class TypedModelMetaclass(ModelBase):
                     and superclass not in (cls, base_class)
                     and hasattr(superclass, "_typedmodels_type")
                 ):
-                    if superclass._typedmodels_subtypes is not None:
+                    if (
+                        superclass._typedmodels_subtypes is not None
+                        and typ not in superclass._typedmodels_subtypes
+                    ):
                         superclass._typedmodels_subtypes.append(typ)
 
             TypedModelMetaclass._patch_fields_cache(cls, base_class)
+            _connect_new_subclass(cls, base_class)
+            _declare_lazy_types(cls, base_class, classdict.get("_lazy_types"))
         elif not cls._meta.abstract:
             # this is the base class
-            cls._typedmodels_registry = {}
+            cls._typedmodels_registry = TypeRegistry()
+            cls._typedmodels_registry.aliases.update(cls._type_aliases)
+            type_field = cast(models.CharField, cls._meta.get_field("type"))
+            setattr(cls, "type", TypeDescriptor(type_field))  # noqa: B010
 
             # Since fields may be added by subclasses, save original fields.
             cls._meta._typedmodels_original_fields = {f.name for f in cls._meta.fields}
@@ -237,6 +1561,7 @@ class TypedModelMetaclass(ModelBase):
                 Returns a list of the classes which are proxy subtypes of this concrete typed model.
                 """
                 if subcls is cls:
+                    cls._typedmodels_registry.import_lazy()
                     return list(cls._typedmodels_registry.values())
                 else:
                     return [cls._typedmodels_registry[k] for k in subcls._typedmodels_subtypes]
@@ -249,11 +1574,12 @@ class TypedModelMetaclass(ModelBase):
                 which are proxy subtypes of this concrete typed model.
                 """
                 if subcls is cls:
-                    return list(cls._typedmodels_registry.keys())
+                    return [*cls._typedmodels_registry, *cls._typedmodels_registry.lazy]
                 else:
                     return subcls._typedmodels_subtypes[:]
 
             cls.get_types = classmethod(_get_types)  # type: ignore
+            _declare_lazy_types(cls, cls, cls._lazy_types)
 
         return cls
 
@@ -326,6 +1652,12 @@ class TypedModelOptions(Options):
     _typedmodels_original_many_to_many: set[str]
     fields_from_subclasses: dict[str, Field]
     declared_fields: dict[str, Field]
+    dropped_indexes: list[models.Index]
+    json_fields: dict[str, Field]
+    side_table_model: "builtins.type[models.Model] | None"
+    _typedmodels_unique_checks: dict[tuple, tuple[list, list]]
+    _typedmodels_pickle_layout: "_PickleLayout"
+    _typedmodels_relation_owners: "dict[Field, tuple[builtins.type[TypedModel], ...] | None]"
 
 
 class TypedModel(models.Model, metaclass=TypedModelMetaclass):
@@ -365,7 +1697,7 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
     _typedmodels_type: ClassVar[str]
     _typedmodels_subtypes: ClassVar[list[str]]
     # NB: builtins.type used because `type` is shadowed by the CharField below.
-    _typedmodels_registry: ClassVar["dict[str, builtins.type[TypedModel]]"]
+    _typedmodels_registry: ClassVar[TypeRegistry]
     _meta: ClassVar[TypedModelOptions]
     # Set by the metaclass to the non-proxy TypedModel ancestor (or None on the
     # base class itself). Declared here so type-checkers can see it on instances.
@@ -378,6 +1710,36 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
     # Class variable indicating if model should be automatically recasted after initialization
     _auto_recast = True
 
+    # Class variable which, when set on a typed base model, stores types as paths through the
+    # class hierarchy (e.g. "myapp.feline/myapp.bigcat/") so that querying a subclass and its
+    # descendants is a prefix filter on the type column instead of a growing IN list.
+    # Short type names ("myapp.bigcat") are still accepted anywhere a type is.
+    _hierarchical_types = False
+
+    # Class variable which, when set on a typed base model, maps other type values to current
+    # ones. Rows with an old value load as the current class, e.g. while a renamed type is
+    # being rewritten by typedmodels.operations.RenameTypedModelType.
+    _type_aliases: ClassVar[dict[str, str]] = {}
+
+    # Class variable which, when set on a typed model, maps the type values of some of its typed
+    # subclasses to the dotted paths of the classes. Those classes are imported when one of
+    # their types is first looked up (e.g. to load a row), rather than up front. They can't add
+    # fields to the shared table. Building the migration state imports them.
+    _lazy_types: ClassVar[dict[str, str]] = {}
+
+    # Class variable which, when set on a typed base model, names a JSONField on it. Typed
+    # subclasses can then set `_json_fields` (to True, or a list of field names) to store their
+    # declared fields as keys in that JSONField, instead of adding columns to the shared table.
+    _json_storage_field: ClassVar[str | None] = None
+
+    # Class variable which, when set on a typed subclass, lists fields declared on it which
+    # should be stored in a one-to-one side table (created by typedmodels) instead of in the
+    # shared table. Useful for large fields which are rarely read.
+    _side_table_fields: ClassVar[Collection[str]] = ()
+
+    # Names of the JSON and side table fields available on this class.
+    _typedmodels_external_fields: ClassVar[frozenset[str]] = frozenset()
+
     class Meta:
         abstract = True
 
@@ -403,6 +1765,16 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
             except KeyError:
                 raise ValueError(f"Invalid {cls.__name__} identifier: {type_value!r}") from None
 
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            key = (db, cls.base_class or cls, values_by_name.get(cls._meta.pk.attname))
+            existing = identity_map.get(key)
+            if existing is not None and (
+                type(existing) is target_cls if type_value else isinstance(existing, cls)
+            ):
+                existing._load_missing_values(values_by_name, type_value)
+                return existing
+
         if target_cls is not cls or len(values) != len(target_cls._meta.concrete_fields):
             # Reshape values to match `target_cls`'s concrete fields. This
             # handles both deferred fields (DEFERRED placeholder) and the
@@ -414,8 +1786,61 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
         new = target_cls(*values, _typedmodels_do_recast=False)
         new._state.adding = False
         new._state.db = db
+        if type_value and type_value != target_cls._typedmodels_type:
+            # An alias (e.g. a type that's being renamed); saving will store the current value.
+            new.type = target_cls._typedmodels_type
+        if "type" not in values_by_name and hasattr(target_cls, "_typedmodels_type"):
+            # The row may actually be of a subclass of target_cls, so TypeDescriptor
+            # mustn't resolve `type` from the class; load it on access instead.
+            vars(new)["_typedmodels_type_deferred"] = True
+        if identity_map is not None and key[2] is not None:
+            identity_map.add(key, new)
         return new
 
+    def _load_missing_values(self, values_by_name: dict[str, Any], type_value) -> None:
+        # Fills in fields which were deferred when this instance was loaded, from a later query
+        # of the same row. Fields which were loaded already are left alone.
+        data = vars(self)
+        for field in self._meta.concrete_fields:
+            value = values_by_name.get(field.attname, DEFERRED)
+            if value is not DEFERRED and field.attname != "type" and field.attname not in data:
+                data[field.attname] = value
+        if type_value:
+            data.pop("_typedmodels_type_deferred", None)
+
+    def refresh_from_db(self, using=None, fields=None, *args, **kwargs) -> None:
+        data = vars(self)
+        side_rows = data.get("_typedmodels_side_rows", {})
+        dirty_side_models = data.get("_typedmodels_dirty_side_rows", set())
+        if fields is None:
+            # Side table rows are loaded again when next accessed.
+            side_rows.clear()
+            dirty_side_models.clear()
+        elif self._typedmodels_external_fields:
+            fields = list(fields)
+            for name in self._typedmodels_external_fields.intersection(fields):
+                fields.remove(name)
+                attribute = getattr(self.__class__, name)
+                if isinstance(attribute, JSONFieldAttribute):
+                    if attribute.storage_name not in fields:
+                        fields.append(attribute.storage_name)
+                else:
+                    side_rows.pop(attribute.side_model._meta.label, None)
+                    dirty_side_models.discard(attribute.side_model._meta.label)
+            if not fields:
+                return
+        # Django loads the row into a new instance and copies its values across, so that
+        # instance mustn't be this one.
+        with suspend_identity_map():
+            super().refresh_from_db(using, fields, *args, **kwargs)
+
+    def get_deferred_fields(self) -> set[str]:
+        deferred = super().get_deferred_fields()
+        if "_typedmodels_type_deferred" not in self.__dict__ and hasattr(self, "_typedmodels_type"):
+            # Not in __dict__, but resolved from the class by TypeDescriptor.
+            deferred.discard("type")
+        return deferred
+
     @classmethod
     def get_type_classes(cls) -> "list[builtins.type[Self]]":
         """
@@ -459,8 +1884,14 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
         # Bind via the base class so that fields defined on sibling subclasses
         # (and therefore present in the shared table) are still recognised.
         # The subclass `_meta` is filtered by _patch_fields_cache.
+        external_values = {}
         if self.base_class:
             before_class = self.__class__
+            if kwargs and before_class._typedmodels_external_fields:
+                # The base class doesn't know about this class's JSON or side table fields,
+                # so set them once it's done.
+                for name in before_class._typedmodels_external_fields & kwargs.keys():
+                    external_values[name] = kwargs.pop(name)
             # __class__ is reassigned here (and below) to route super().__init__
             # via the base class's unfiltered _meta. Type-checkers reasonably
             # don't like this; the mechanism is core to how typedmodels exploits
@@ -471,6 +1902,12 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
         super().__init__(*args, **kwargs)
         if before_class:
             self.__class__ = before_class
+            if "type" in self.__dict__:
+                # Set while routed via the base class; assign it again so TypeDescriptor
+                # can drop it if it's implied by the class.
+                self.type = vars(self).pop("type")
+            for name, value in external_values.items():
+                setattr(self, name, value)
 
         # __new__ has already resolved the typed subclass from the `type`
         # kwarg, so for the common kwargs-construction path this is a no-op.
@@ -513,41 +1950,383 @@ class TypedModel(models.Model, metaclass=TypedModelMetaclass):
             correct_cls = base._typedmodels_registry[typ_str]
         except KeyError:
             raise ValueError(f"Invalid {base.__name__} identifier: {typ!r}") from None
-
-        self.type = typ_str
+        # typ_str may have been an alias
+        typ_str = correct_cls._typedmodels_type
 
         current_cls = self.__class__
 
         if current_cls is not correct_cls:
+            if not self._state.adding and hasattr(current_cls, "_typedmodels_type"):
+                # Cached results containing the row as its previous type are invalidated by save().
+                vars(self).setdefault("_typedmodels_previous_types", set()).add(
+                    current_cls._typedmodels_type
+                )
             # Downcasting an existing instance to its typed subclass is the
             # whole point of recast(); type-checkers can't express in-place
             # __class__ mutation.
             self.__class__ = correct_cls  # pyright: ignore[reportAttributeAccessIssue]
 
+        # Assigned after changing the class, so TypeDescriptor doesn't store a copy.
+        self.type = typ_str
+
     def save(self, *args, **kwargs) -> None:
         self.presave(*args, **kwargs)
-        return super().save(*args, **kwargs)
+        data = vars(self)
+        # The row may be new (and a row inserted in a transaction which was rolled back may
+        # have been cached under the same pk), or its type may change.
+        type_may_change = (
+            self._state.adding or "type" in data or "_typedmodels_previous_types" in data
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self._typedmodels_external_fields:
+            # Side table fields are saved below; they're not fields of this model.
+            kwargs["update_fields"] = [
+                name for name in update_fields if name not in self._typedmodels_external_fields
+            ]
+
+        # Only write side tables whose fields were set.
+        dirty_side_models = data.get("_typedmodels_dirty_side_rows")
+        if dirty_side_models:
+            # As with multi-table inheritance, the rows are saved together or not at all.
+            using = kwargs.get("using") or router.db_for_write(self.__class__, instance=self)
+            context_manager: Any = transaction.atomic(using=using, savepoint=False)
+        else:
+            context_manager = nullcontext()
+        with context_manager:
+            self._save_row(*args, **kwargs)
+            for label in dirty_side_models or ():
+                row = data["_typedmodels_side_rows"][label]
+                row.pk = self.pk
+                row.save(using=self._state.db)
+        data.pop("_typedmodels_dirty_side_rows", None)
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.add(self._identity_key(), self)
+        using = self._state.db or router.db_for_write(self.__class__, instance=self)
+        if type_may_change:
+            forget_type(self.base_class or self.__class__, using, self.pk)
+        previous_types = data.pop("_typedmodels_previous_types", set())
+        if query_cache_in_use():
+            types = previous_types | {self.type, getattr(self.__class__, "_typedmodels_type", None)}
+            _invalidate_cached_results(self.__class__, types, using)
+
+    def _save_row(self, *args, **kwargs) -> None:
+        data = vars(self)
+        if "type" in data or "_typedmodels_type_deferred" in data:
+            super().save(*args, **kwargs)
+        else:
+            # Model.save() looks for deferred fields in __dict__ directly, so store the
+            # class-level value for the duration of the save, or `type` wouldn't be written.
+            typ = self.__class__._typedmodels_type
+            data["type"] = typ
+            try:
+                super().save(*args, **kwargs)
+            finally:
+                if data.get("type") == typ:
+                    del data["type"]
+
+    def delete(self, *args, **kwargs):
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map.discard(self._identity_key())
+        using = self._state.db or router.db_for_write(self.__class__, instance=self)
+        if query_cache_in_use():
+            _invalidate_cached_results(self.__class__, [self.type], using)
+        pk = self.pk
+        deleted = super().delete(*args, **kwargs)
+        forget_type(self.base_class or self.__class__, using, pk)
+        return deleted
+
+    def _identity_key(self) -> tuple[str | None, "builtins.type[TypedModel]", Any]:
+        return (self._state.db, self.base_class or self.__class__, self.pk)
+
+    def __copy__(self):
+        # As copy.copy() does for other models (via Model.__getstate__(), which copies the
+        # state and its related objects cache), rather than through __reduce__().
+        obj = self.__class__.__new__(self.__class__)
+        vars(obj).update(self.__getstate__())
+        return obj
+
+    def __reduce__(self):
+        # Pickles as the type and a tuple of the values of the class's own concrete fields,
+        # rather than the whole __dict__ (which may also hold other subclasses' fields).
+        data = vars(self)
+        base_class = self.base_class
+        if base_class is None or "_typedmodels_type_deferred" in data:
+            return super().__reduce__()
+        typ = self._typedmodels_type
+        if data.get("type", typ) != typ:
+            return super().__reduce__()
+        attnames, _other_fields, skipped = _pickle_layout(self.__class__)
+        try:
+            values = tuple(data[attname] for attname in attnames)
+        except KeyError:
+            # Deferred fields.
+            return super().__reduce__()
+        if any(isinstance(value, memoryview) for value in values):
+            return super().__reduce__()
+
+        state = self._state
+        extra = {name: value for name, value in data.items() if name not in skipped}
+        args = (
+            (base_class._meta.app_label, base_class._meta.object_name),
+            typ,
+            # The same tuple for every instance of the class, so pickle stores it once.
+            attnames,
+            values,
+            state.db,
+            state.adding,
+            state.fields_cache,
+            extra,
+        )
+        # Leave out trailing arguments which have their default (falsy) value.
+        while not args[-1]:
+            args = args[:-1]
+        return _unpickle_typed_model, args
 
     def presave(self, *args, **kwargs) -> None:
         """Perform checks before saving the model."""
         if not getattr(self, "_typedmodels_type", None):
             raise RuntimeError(f"Untyped {self.__class__.__name__} cannot be saved.")
 
+    def clean_fields(self, exclude=None) -> None:
+        errors: dict[str, Any] = {}
+        try:
+            super().clean_fields(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        # Fields stored in the JSONField aren't in _meta.fields, so Django doesn't clean them.
+        for name, field in self._meta.json_fields.items():
+            if exclude and name in exclude:
+                continue
+            storage_name = getattr(self.__class__, name).storage_name
+            data = getattr(self, storage_name) or {}
+            raw_value = data.get(name, field.get_default())
+            if field.blank and raw_value in field.empty_values:
+                continue
+            try:
+                value = field.clean(raw_value, self)
+            except ValidationError as e:
+                errors[name] = e.error_list
+            else:
+                if name in data:
+                    # Missing keys already read as the default; don't store it.
+                    setattr(self, name, value)
+        if errors:
+            raise ValidationError(errors)
+
     def _get_unique_checks(self, exclude=None, **kwargs):
-        # django-stubs omits underscore-prefixed Model methods from its public stubs.
-        unique_checks, date_checks = super()._get_unique_checks(  # pyright: ignore[reportAttributeAccessIssue]
-            exclude=exclude, **kwargs
-        )
+        # The checks only depend on the class and the arguments, so they're computed once per
+        # proxy class (_meta is per-class) for each combination of arguments.
+        cache_key = (frozenset(exclude or ()), tuple(sorted(kwargs.items())))
+        try:
+            cache = self._meta._typedmodels_unique_checks
+        except AttributeError:
+            cache = self._meta._typedmodels_unique_checks = {}
+        try:
+            unique_checks, date_checks = cache[cache_key]
+        except KeyError:
+            # django-stubs omits underscore-prefixed Model methods from its public stubs.
+            unique_checks, date_checks = super()._get_unique_checks(  # pyright: ignore[reportAttributeAccessIssue]
+                exclude=exclude, **kwargs
+            )
+            # Drop checks involving fields which aren't actually on this proxy model.
+            fields_map = self._meta._forward_fields_map  # pyright: ignore[reportAttributeAccessIssue]
+            unique_checks = [
+                (model_class, field_names)
+                for model_class, field_names in unique_checks
+                if all(fn in fields_map for fn in field_names)
+            ]
+            cache[cache_key] = (unique_checks, date_checks)
+        # Copies, in case callers modify them.
+        return list(unique_checks), list(date_checks)
 
-        for i, (_model_class, field_names) in reversed(list(enumerate(unique_checks))):
-            for fn in field_names:
-                try:
-                    self._meta.get_field(fn)
-                except FieldDoesNotExist:
-                    # Some field in this unique check isn't actually on this proxy model.
-                    unique_checks.pop(i)
-                    break
-        return unique_checks, date_checks
+    @classmethod
+    def validate_unique_many(
+        cls, instances: "Iterable[TypedModel]", exclude: "Collection[str] | None" = None
+    ) -> "dict[int, ValidationError]":
+        """
+        Like calling ``validate_unique()`` on each of ``instances``, but each uniqueness check
+        is resolved for the whole batch with a single query (per chunk of lookups), instead of
+        one query per check per instance. Duplicates within the batch are reported too.
+
+        Returns a dict mapping the index of each invalid instance to the ``ValidationError``
+        ``validate_unique()`` would have raised for it. Date checks (``unique_for_date`` etc.)
+        are still performed one instance at a time.
+        """
+        instances = list(instances)
+        errors: dict[int, dict[str, list[ValidationError]]] = {}
+
+        # Group the lookups for every instance by the check they belong to.
+        lookups_by_check: dict[tuple, list[tuple[int, tuple]]] = {}
+        for index, instance in enumerate(instances):
+            unique_checks, date_checks = instance._get_unique_checks(exclude=exclude)
+            for model_class, unique_check in unique_checks:
+                key = _unique_check_key(instance, unique_check)
+                if key is not None:
+                    lookups_by_check.setdefault((model_class, unique_check), []).append(
+                        (index, key)
+                    )
+            if date_checks:
+                # django-stubs omits underscore-prefixed Model methods from its public stubs.
+                date_errors = instance._perform_date_checks(date_checks)  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+                for field_name, field_errors in date_errors.items():
+                    errors.setdefault(index, {}).setdefault(field_name, []).extend(field_errors)
+
+        for (model_class, unique_check), lookups in lookups_by_check.items():
+            opts = model_class._meta
+            fields = [cast(Field, opts.get_field(fn)) for fn in unique_check]
+            attnames = [f.attname for f in fields]
+            manager = model_class._default_manager
+            # Stay well within the backend's limit on query parameters.
+            max_params = connections[manager.db].features.max_query_params or 2000
+            chunk_size = max(1, max_params // (2 * len(unique_check)))
+
+            existing: dict[tuple, set] = {}
+            keys = list({key for _index, key in lookups})
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start : start + chunk_size]
+                chunk_keys = set(chunk)
+                if len(unique_check) == 1:
+                    condition = Q(**{f"{unique_check[0]}__in": [key[0] for key in chunk]})
+                else:
+                    condition = Q()
+                    for key in chunk:
+                        condition |= Q(**dict(zip(unique_check, key, strict=True)))
+                unmatched = False
+                for *values, pk in manager.filter(condition).values_list(*attnames, "pk"):
+                    key = _normalize_unique_values(fields, values)
+                    existing.setdefault(key, set()).add(pk)
+                    unmatched = unmatched or key not in chunk_keys
+                if unmatched:
+                    # The database matched values which aren't equal in Python (e.g. under a
+                    # case-insensitive collation), so look up each of the chunk's values
+                    # which didn't come back as-is.
+                    for key in chunk_keys - existing.keys():
+                        lookup = dict(zip(unique_check, key, strict=True))
+                        pks = set(manager.filter(**lookup).values_list("pk", flat=True))
+                        if pks:
+                            existing[key] = pks
+
+            seen_in_batch = set()
+            for index, key in lookups:
+                instance = instances[index]
+                pk = instance._get_pk_val(opts)  # pyright: ignore[reportAttributeAccessIssue]
+                conflicting_pks = existing.get(key, set())
+                if not instance._state.adding and pk is not None:
+                    conflicting_pks = conflicting_pks - {pk}
+                if conflicting_pks or key in seen_in_batch:
+                    error_key = unique_check[0] if len(unique_check) == 1 else NON_FIELD_ERRORS
+                    errors.setdefault(index, {}).setdefault(error_key, []).append(
+                        instance.unique_error_message(model_class, unique_check)
+                    )
+                seen_in_batch.add(key)
+
+        return {
+            index: ValidationError(instance_errors) for index, instance_errors in errors.items()
+        }
+
+
+def _unique_check_key(instance: TypedModel, unique_check: tuple[str, ...]) -> tuple | None:
+    """
+    Returns the values ``instance`` would be looked up by for ``unique_check``, or None if
+    the check doesn't apply (mirroring ``Model._perform_unique_checks``).
+    """
+    key = []
+    for field_name in unique_check:
+        f = cast(Field, instance._meta.get_field(field_name))
+        value = getattr(instance, f.attname)
+        if value is None or (value == "" and connection.features.interprets_empty_strings_as_nulls):
+            return None
+        if f.primary_key and not instance._state.adding:
+            return None
+        key.append(value)
+    return _normalize_unique_values([instance._meta.get_field(fn) for fn in unique_check], key)
+
+
+def _normalize_unique_values(fields: "list[Any]", values: Iterable[Any]) -> tuple:
+    # The values as they'd be sent to the database, so e.g. "5" and 5 are the same key.
+    key = []
+    for f, value in zip(fields, values, strict=True):
+        try:
+            value = f.get_prep_value(f.to_python(value))
+        except (ValidationError, TypeError, ValueError):
+            # Invalid; full_clean() will report it.
+            pass
+        key.append(value)
+    return tuple(key)
+
+
+class _PickleLayout(typing.NamedTuple):
+    # The fields pickled by TypedModel.__reduce__: the class's concrete fields except `type`,
+    # which is implied by the class.
+    attnames: tuple[str, ...]
+    # Other subclasses' fields, which are set to their defaults on unpickling (as __init__ does).
+    other_fields: tuple[Field, ...]
+    # __dict__ keys which aren't pickled as extra attributes.
+    skipped: frozenset[str]
+
+
+def _pickle_layout(cls: builtins.type[TypedModel]) -> _PickleLayout:
+    opts = cls._meta
+    try:
+        return opts._typedmodels_pickle_layout
+    except AttributeError:
+        pass
+    attnames = tuple(f.attname for f in opts.concrete_fields if f.attname != "type")
+    base_class = cls.base_class or cls
+    base_fields = base_class._meta.concrete_fields
+    opts._typedmodels_pickle_layout = _PickleLayout(
+        attnames=attnames,
+        other_fields=tuple(
+            f for f in base_fields if f.attname not in attnames and f.attname != "type"
+        ),
+        skipped=frozenset([f.attname for f in base_fields] + ["_state"]),
+    )
+    return opts._typedmodels_pickle_layout
+
+
+def _unpickle_typed_model(
+    class_id: tuple[str, str],
+    typ: str,
+    attnames: tuple[str, ...],
+    values: tuple,
+    db: str | None = None,
+    adding: bool = False,
+    fields_cache: dict | None = None,
+    extra: dict | None = None,
+) -> TypedModel:
+    from django.apps import apps
+
+    base_class = cast(builtins.type[TypedModel], apps.get_model(*class_id))
+    cls = base_class._typedmodels_registry[typ]
+    layout = _pickle_layout(cls)
+    # Like Django's own unpickling, this doesn't call __init__ (or send init signals).
+    obj = cls.__new__(cls)
+    data = vars(obj)
+    state = data["_state"] = ModelState()
+    state.db = db
+    state.adding = adding
+    if fields_cache:
+        vars(state)["fields_cache"] = fields_cache
+    if attnames == layout.attnames:
+        data.update(zip(attnames, values, strict=True))
+    else:
+        # Pickled before the class's fields changed (e.g. cached before a deploy). The values
+        # of fields which are gone are dropped, and new fields are left deferred, so they're
+        # loaded when first accessed.
+        current = set(layout.attnames)
+        data.update(
+            (attname, value)
+            for attname, value in zip(attnames, values, strict=True)
+            if attname in current
+        )
+    for field in layout.other_fields:
+        data[field.attname] = field.get_default()
+    if extra:
+        data.update(extra)
+    return obj
 
 
 # Monkey patching Python and XML serializers in Django to use model name from base class.
@@ -593,3 +2372,20 @@ def _start_object(self, obj: "Model") -> None:
 
 
 _XmlSerializer.start_object = _start_object  # type: ignore
+
+
+# Monkey patching the migration state built from the app registry (e.g. by makemigrations) to
+# import lazily imported typed subclasses first, so their proxy models are always part of it
+# rather than depending on whether something happened to import them.
+_project_state_from_apps = ProjectState.from_apps.__func__  # type: ignore[attr-defined]
+
+
+def _from_apps(cls, apps) -> ProjectState:
+    if apps is global_apps:
+        for model in apps.get_models():
+            if issubclass(model, TypedModel) and "_typedmodels_registry" in vars(model):
+                model._typedmodels_registry.import_lazy()
+    return _project_state_from_apps(cls, apps)
+
+
+ProjectState.from_apps = classmethod(_from_apps)  # type: ignore
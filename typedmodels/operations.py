@@ -0,0 +1,282 @@
+"""
+Migration operations for typed models.
+"""
+
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from django.db import transaction
+from django.db.backends.utils import truncate_name
+from django.db.migrations.exceptions import IrreversibleError
+from django.db.migrations.operations.base import Operation
+
+from .parallel import chunk_ranges
+
+if TYPE_CHECKING:
+    from .models import TypedModel
+
+logger = logging.getLogger(__name__)
+
+
+def rewrite_types(
+    model, using: str, old_types: list[str], new_type: str, batch_size: int, sleep: float
+):
+    """
+    Changes the ``type`` of every row of ``model`` whose type is one of ``old_types`` to
+    ``new_type``, in pk order, committing after each batch of ``batch_size`` rows.
+
+    Only rows which still have an old type are touched, so if this is interrupted, running it
+    again carries on where it left off.
+    """
+    qs = model._base_manager.using(using).filter(type__in=old_types)
+    total = qs.count()
+    done = 0
+    for after_pk, last_pk in chunk_ranges(qs, batch_size):
+        chunk = qs.filter(pk__lte=last_pk)
+        if after_pk is not None:
+            chunk = chunk.filter(pk__gt=after_pk)
+        # Short transactions, so other writers are only blocked for a batch at a time.
+        with transaction.atomic(using=using):
+            done += chunk.update(type=new_type)
+        logger.info(
+            "Changed type of %d/%d %s rows from %s to %r",
+            done,
+            total,
+            model._meta.label,
+            " or ".join(repr(t) for t in old_types),
+            new_type,
+        )
+        if sleep:
+            time.sleep(sleep)
+    return done
+
+
+class _RewriteTypesOperation(Operation):
+    reduces_to_sql = False
+    # Each batch commits separately. Put these operations in a migration with `atomic = False`,
+    # otherwise the whole migration (and so every batch) runs in one long transaction.
+    atomic = False
+
+    def __init__(self, model_name: str, batch_size: int = 1000, sleep: float = 0.0):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.sleep = sleep
+
+    @property
+    def model_name_lower(self) -> str:
+        return self.model_name.lower()
+
+    def _deconstruct(self, kwargs: dict[str, Any]):
+        kwargs = {"model_name": self.model_name, **kwargs}
+        if self.batch_size != 1000:
+            kwargs["batch_size"] = self.batch_size
+        if self.sleep:
+            kwargs["sleep"] = self.sleep
+        return (self.__class__.__qualname__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        # Type values aren't part of the migration state.
+        pass
+
+    def _rewrite(self, app_label, schema_editor, state, old_types, new_type):
+        model = state.apps.get_model(app_label, self.model_name)
+        using = schema_editor.connection.alias
+        if self.allow_migrate_model(using, model):
+            rewrite_types(model, using, old_types, new_type, self.batch_size, self.sleep)
+
+
+class RenameTypedModelType(_RewriteTypesOperation):
+    """
+    Changes the ``type`` value of every row of a typed model from ``old_type`` to ``new_type``
+    (e.g. after renaming a typed subclass, or moving it to another app), in batches.
+
+    To keep running code working while this runs, add the old value to the base model's
+    ``_type_aliases`` until the migration has been applied everywhere.
+    """
+
+    reversible = True
+
+    def __init__(
+        self,
+        model_name: str,
+        old_type: str,
+        new_type: str,
+        batch_size: int = 1000,
+        sleep: float = 0.0,
+    ):
+        super().__init__(model_name, batch_size=batch_size, sleep=sleep)
+        self.old_type = old_type
+        self.new_type = new_type
+
+    def deconstruct(self):
+        return self._deconstruct({"old_type": self.old_type, "new_type": self.new_type})
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._rewrite(app_label, schema_editor, to_state, [self.old_type], self.new_type)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._rewrite(app_label, schema_editor, to_state, [self.new_type], self.old_type)
+
+    def describe(self):
+        return f"Rename type {self.old_type!r} to {self.new_type!r} on {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"rename_{self.model_name_lower}_type"
+
+
+class MergeTypedModelTypes(_RewriteTypesOperation):
+    """
+    Changes the ``type`` value of every row of a typed model with one of ``old_types`` to
+    ``new_type``, in batches. This can't be reversed.
+
+    As with ``RenameTypedModelType``, add the old values to the base model's ``_type_aliases``
+    while this is being deployed.
+    """
+
+    reversible = False
+
+    def __init__(
+        self,
+        model_name: str,
+        old_types: list[str],
+        new_type: str,
+        batch_size: int = 1000,
+        sleep: float = 0.0,
+    ):
+        super().__init__(model_name, batch_size=batch_size, sleep=sleep)
+        self.old_types = list(old_types)
+        self.new_type = new_type
+
+    def deconstruct(self):
+        return self._deconstruct({"old_types": self.old_types, "new_type": self.new_type})
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._rewrite(app_label, schema_editor, to_state, self.old_types, self.new_type)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        raise IrreversibleError(f"Operation {self.describe()} is not reversible.")
+
+    def describe(self):
+        old_types = ", ".join(repr(t) for t in self.old_types)
+        return f"Merge types {old_types} into {self.new_type!r} on {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"merge_{self.model_name_lower}_types"
+
+
+def get_view_definitions(model: "type[TypedModel]") -> dict[str, dict[str, list[str]]]:
+    """
+    Returns the views ``CreateTypedModelView`` should create for the typed subclasses of a
+    typed model, as a dict mapping each view name to its ``types`` and ``columns``.
+
+    Each subclass gets a view named like the table it would have if it weren't a proxy
+    (``<app_label>_<model_name>``), selecting the columns of the fields it has, from the rows
+    of its own type and its subclasses' types. Lazily imported subclasses (see
+    ``TypedModel._lazy_types``) are imported, so they get views too.
+    """
+    base_class = model.base_class or model
+    base_class._typedmodels_registry.import_lazy()
+    views: dict[str, dict[str, list[str]]] = {}
+    for typ_cls in base_class._typedmodels_registry.values():
+        opts = typ_cls._meta
+        views[f"{opts.app_label}_{opts.model_name}"] = {
+            "types": sorted(typ_cls.get_types()),
+            "columns": [field.column for field in opts.concrete_fields if field.column],
+        }
+    return dict(sorted(views.items()))
+
+
+class _TypedModelViewOperation(Operation):
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name: str, name: str, types: list[str], columns: list[str]):
+        self.model_name = model_name
+        self.name = name
+        self.types = list(types)
+        self.columns = list(columns)
+
+    @property
+    def model_name_lower(self) -> str:
+        return self.model_name.lower()
+
+    def deconstruct(self):
+        kwargs = {
+            "model_name": self.model_name,
+            "name": self.name,
+            "types": self.types,
+            "columns": self.columns,
+        }
+        return (self.__class__.__qualname__, [], kwargs)
+
+    def state_forwards(self, app_label, state):
+        # Views aren't part of the migration state.
+        pass
+
+    def _create_view(self, app_label, schema_editor, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        quote_name = schema_editor.quote_name
+        # Literal values, since not every backend takes parameters in DDL.
+        types = ", ".join(schema_editor.quote_value(typ) for typ in self.types)
+        schema_editor.execute(
+            f"CREATE VIEW {quote_name(self._view_name(schema_editor))} AS "
+            f"SELECT {', '.join(quote_name(column) for column in self.columns)} "
+            f"FROM {quote_name(model._meta.db_table)} "
+            f"WHERE {quote_name(model._meta.get_field('type').column)} IN ({types})"
+        )
+
+    def _drop_view(self, app_label, schema_editor, state):
+        model = state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(
+                f"DROP VIEW {schema_editor.quote_name(self._view_name(schema_editor))}"
+            )
+
+    def _view_name(self, schema_editor) -> str:
+        return truncate_name(self.name, schema_editor.connection.ops.max_name_length())
+
+
+class CreateTypedModelView(_TypedModelViewOperation):
+    """
+    Creates a database view named ``name``, selecting ``columns`` from the table of a typed
+    model, for the rows with one of ``types``. See ``get_view_definitions()``, and the
+    ``typedmodels_views`` management command, which writes these operations.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._create_view(app_label, schema_editor, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._drop_view(app_label, schema_editor, from_state)
+
+    def describe(self):
+        return f"Create view {self.name} of {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"create_view_{self.name.lower()}"
+
+
+class DeleteTypedModelView(_TypedModelViewOperation):
+    """
+    Drops a view created by ``CreateTypedModelView``. It takes the same arguments, so it can
+    be reversed.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self._drop_view(app_label, schema_editor, from_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self._create_view(app_label, schema_editor, to_state)
+
+    def describe(self):
+        return f"Delete view {self.name} of {self.model_name}"
+
+    @property
+    def migration_name_fragment(self):
+        return f"delete_view_{self.name.lower()}"
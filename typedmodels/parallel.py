@@ -0,0 +1,209 @@
+"""
+Helpers for processing typed querysets in parallel.
+"""
+
+import json
+import os
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Protocol, TypeVar
+
+from django.db import connections
+
+if TYPE_CHECKING:
+    from .models import TypedModel, TypedModelQuerySet
+
+R = TypeVar("R")
+
+
+class Checkpoint(Protocol):
+    """
+    Stores the pk up to which a ``map_chunks()`` job has finished, so it can be resumed.
+    """
+
+    def load(self) -> Any: ...
+
+    def save(self, pk: Any) -> None: ...
+
+
+class FileCheckpoint:
+    """
+    A ``Checkpoint`` kept in a small JSON file.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self.path = path
+
+    def load(self) -> Any:
+        try:
+            with open(self.path) as f:
+                return json.load(f)["pk"]
+        except FileNotFoundError:
+            return None
+
+    def save(self, pk: Any) -> None:
+        # Write-then-rename, so a crash mid-write can't leave a truncated checkpoint.
+        tmp_path = f"{os.fspath(self.path)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"pk": pk}, f, default=str)
+        os.replace(tmp_path, self.path)
+
+
+def init_worker() -> None:
+    """
+    Prepares a freshly started worker process for database access.
+
+    Pass this as the ``initializer`` of any ``ProcessPoolExecutor`` that runs queries.
+    Connections inherited from a forked parent are discarded without being closed (closing
+    them would tear down the parent's connection too), so the worker opens its own.
+    """
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        # Spawned (rather than forked) workers start with an empty interpreter.
+        django.setup()
+    for conn in connections.all(initialized_only=True):
+        conn.connection = None
+
+
+def _default_max_workers(processes: bool) -> int:
+    # The defaults of ProcessPoolExecutor and ThreadPoolExecutor.
+    cpu_count = os.cpu_count() or 1
+    return cpu_count if processes else min(32, cpu_count + 4)
+
+
+def _make_executor(processes: bool, max_workers: int | None) -> Executor:
+    if processes:
+        # Don't let forked workers share the parent's connections.
+        return ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _queryset_state(qs: "TypedModelQuerySet") -> "tuple[type[TypedModelQuerySet], dict[str, Any]]":
+    # Pickling a QuerySet fetches its rows first, in the process pickling it. Send the state of
+    # an unevaluated clone instead (its query, database, etc.), so the worker runs the query.
+    clone = qs._chain()  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+    return type(qs), clone.__dict__
+
+
+def _call(
+    func: "Callable[[TypedModelQuerySet], R]",
+    qs_state: "tuple[type[TypedModelQuerySet], dict[str, Any]]",
+) -> R:
+    qs_cls, state = qs_state
+    qs = qs_cls.__new__(qs_cls)
+    qs.__dict__.update(state)  # pyright: ignore[reportAttributeAccessIssue]
+    try:
+        return func(qs)
+    finally:
+        # Each worker thread gets its own connections; don't leak them once the task is done.
+        connections.close_all()
+
+
+def run_by_type(
+    queryset: "TypedModelQuerySet",
+    func: "Callable[[TypedModelQuerySet], R]",
+    *,
+    processes: bool = False,
+    max_workers: int | None = None,
+) -> "dict[type[TypedModel], R]":
+    """
+    Calls ``func`` once for each per-type queryset returned by ``queryset.split_by_type()``,
+    concurrently, and returns a dict mapping each typed subclass to the result.
+
+    By default a thread pool is used. With ``processes=True`` a process pool is used instead;
+    ``func`` and the results must then be picklable (so ``func`` must be a module-level
+    function). The querysets are sent to the workers unevaluated, so each worker runs its own
+    query.
+    """
+    querysets = queryset.split_by_type()
+    if not querysets:
+        return {}
+
+    with _make_executor(processes, max_workers) as executor:
+        futures = {
+            typ_cls: executor.submit(_call, func, _queryset_state(qs))
+            for typ_cls, qs in querysets.items()
+        }
+        return {typ_cls: future.result() for typ_cls, future in futures.items()}
+
+
+def chunk_ranges(
+    queryset: "TypedModelQuerySet", chunk_size: int, start_after: Any = None
+) -> Iterator[tuple[Any, Any]]:
+    """
+    Yields ``(after_pk, last_pk)`` pairs which split ``queryset`` into chunks of (at most)
+    ``chunk_size`` rows, in pk order. ``after_pk`` is None for the first chunk.
+
+    Boundaries are found lazily by keyset pagination (``pk > after_pk ORDER BY pk LIMIT n``),
+    never with OFFSET, so each step only walks the index from the previous boundary.
+    """
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    after_pk = start_after
+    while True:
+        chunk_pks = pks if after_pk is None else pks.filter(pk__gt=after_pk)
+        last_pk = chunk_pks[chunk_size - 1 : chunk_size].first()
+        if last_pk is None:
+            # Fewer than chunk_size rows left; the last chunk is open-ended.
+            if chunk_pks.exists():
+                yield after_pk, chunk_pks.last()
+            return
+        yield after_pk, last_pk
+        after_pk = last_pk
+
+
+def map_chunks(
+    queryset: "TypedModelQuerySet",
+    func: "Callable[[TypedModelQuerySet], R]",
+    *,
+    chunk_size: int = 10_000,
+    processes: bool = False,
+    max_workers: int | None = None,
+    max_pending: int | None = None,
+    checkpoint: Checkpoint | None = None,
+) -> Iterator[R]:
+    """
+    Splits ``queryset`` into pk-range chunks (see ``chunk_ranges()``), calls ``func`` on each
+    chunk's queryset concurrently, and yields the results in pk order as they become available.
+
+    At most ``max_pending`` chunks (by default, twice the number of workers) are in flight at
+    once, so this is suitable for very large tables. If ``checkpoint`` is given, the job resumes after the last chunk recorded there, and
+    each chunk is recorded once the caller has consumed its result.
+
+    See ``run_by_type()`` for the meaning of ``processes`` and ``max_workers``. Each chunk's rows
+    are only loaded by the worker processing it.
+    """
+    start_after = checkpoint.load() if checkpoint is not None else None
+    ranges = chunk_ranges(queryset, chunk_size, start_after=start_after)
+    if max_workers is None:
+        max_workers = _default_max_workers(processes)
+    if max_pending is None:
+        # Enough work queued to keep every worker busy while we wait on the oldest chunk.
+        max_pending = 2 * max_workers
+    elif max_pending < 1:
+        raise ValueError("max_pending must be at least 1.")
+    executor = _make_executor(processes, max_workers)
+    pending: deque[tuple[Any, Future[R]]] = deque()
+    try:
+        for after_pk, last_pk in ranges:
+            chunk_qs = queryset.filter(pk__lte=last_pk)
+            if after_pk is not None:
+                chunk_qs = chunk_qs.filter(pk__gt=after_pk)
+            pending.append((last_pk, executor.submit(_call, func, _queryset_state(chunk_qs))))
+            if len(pending) >= max_pending:
+                yield from _drain_oldest(pending, checkpoint)
+        while pending:
+            yield from _drain_oldest(pending, checkpoint)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _drain_oldest(
+    pending: "deque[tuple[Any, Future[R]]]", checkpoint: Checkpoint | None
+) -> Iterator[R]:
+    last_pk, future = pending.popleft()
+    yield future.result()
+    if checkpoint is not None:
+        checkpoint.save(last_pk)
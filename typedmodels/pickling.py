@@ -0,0 +1,24 @@
+"""
+Compact encoding of typed model instances, e.g. for caching.
+
+Typed instances pickle as their type and a tuple of their field values (see
+``TypedModel.__reduce__``), so any cache backend which pickles values already benefits.
+These helpers use the highest pickle protocol, which is the most compact.
+"""
+
+import pickle
+from typing import Any
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encodes a typed instance, or any picklable structure containing them.
+    """
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data: bytes) -> Any:
+    """
+    Decodes data encoded by ``dumps()``. Only use this on trusted data.
+    """
+    return pickle.loads(data)
@@ -0,0 +1,80 @@
+"""
+Caching of typed queryset results, invalidated per type.
+
+Each cached result is stored under a key which includes a token for each type its rows can
+have. Writing rows of a type replaces that type's token, so only the results which could
+contain rows of that type are invalidated. Replaced results aren't deleted, they're left for
+the cache backend to evict.
+"""
+
+import hashlib
+from collections.abc import Collection
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import BaseCache
+from django.core.exceptions import EmptyResultSet
+
+from .cache import SettingCache, delete_tokens, new_token
+
+if TYPE_CHECKING:
+    from .models import TypedModel, TypedModelQuerySet
+
+_cache = SettingCache(
+    "TYPEDMODELS_QUERY_CACHE", "typedmodels-queries", {"OPTIONS": {"MAX_ENTRIES": 1000}}
+)
+
+
+def get_query_cache() -> BaseCache:
+    """
+    Returns the cache named by the ``TYPEDMODELS_QUERY_CACHE`` setting, or a process-local
+    in-memory cache if that isn't set.
+    """
+    return _cache.get()
+
+
+def query_cache_in_use() -> bool:
+    """
+    Whether there may be cached results (see ``SettingCache.in_use()``).
+    """
+    return _cache.in_use()
+
+
+def _tag_key(base_class: "type[TypedModel]", typ: str) -> str:
+    return f"typedmodels:tag:{base_class._meta.label_lower}:{typ}"
+
+
+def _tag_tokens(cache: BaseCache, base_class: "type[TypedModel]", types: Collection[str]):
+    keys = [_tag_key(base_class, typ) for typ in sorted(types)]
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            tokens[key] = new_token(cache, key)
+    return [tokens[key] for key in keys]
+
+
+def results_key(qs: "TypedModelQuerySet", *extra: Any) -> str | None:
+    """
+    Returns the cache key of the current results of ``qs``, or None if it can't be cached.
+    ``extra`` values are included in the key, for caching things derived from the results.
+    """
+    model = qs.model
+    base_class = model.base_class or model
+    try:
+        sql, params = qs.query.get_compiler(using=qs.db).as_sql()
+    except EmptyResultSet:
+        return None
+    # Also tells apart e.g. values_list("name") from values_list("name", flat=True).
+    iterable = (qs._iterable_class.__qualname__, qs._fields)  # type: ignore[attr-defined]  # pyright: ignore[reportAttributeAccessIssue]
+    tokens = _tag_tokens(get_query_cache(), base_class, model.get_types())
+    databases = qs._typedmodels_databases() or [qs.db]
+    raw = repr((databases, sql, params, iterable, tokens, extra))
+    return f"typedmodels:query:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def invalidate_types(base_class: "type[TypedModel]", types: Collection[str], using: str) -> None:
+    """
+    Invalidates the cached results which can contain rows of any of the given types.
+    """
+    if not types or not query_cache_in_use():
+        return
+    delete_tokens(get_query_cache(), [_tag_key(base_class, typ) for typ in types], using)
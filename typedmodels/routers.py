@@ -0,0 +1,73 @@
+"""
+A database router which puts typed subclasses on different databases.
+"""
+
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import TypedModel
+
+
+class TypedModelRouter:
+    """
+    Routes reads and writes of typed subclasses to the databases given by the
+    ``TYPEDMODELS_DATABASES`` setting, a dict mapping model labels to database aliases::
+
+        TYPEDMODELS_DATABASES = {"myapp.Feline": "cats"}
+
+    Subclasses of a listed class go to the same database, unless they're listed themselves.
+    The base model's table is created on every database one of its subclasses goes to.
+
+    Querysets of a typed model whose subclasses go to several databases query each of them
+    (see ``typedmodels_fan_out``).
+    """
+
+    # Opts in to typed querysets being spread over the databases their subclasses are routed
+    # to. The databases are worked out once per class, so this router must route typed models
+    # by class alone.
+    typedmodels_fan_out = True
+
+    def _routes(self) -> dict[str, str]:
+        routes = getattr(settings, "TYPEDMODELS_DATABASES", {})
+        return {label.lower(): using for label, using in routes.items()}
+
+    def _db_for_model(self, model: Any) -> str | None:
+        if not (isinstance(model, type) and issubclass(model, TypedModel)):
+            return None
+        routes = self._routes()
+        if model.base_class is None:
+            # The base model is only routed if all of its subclasses go to one database.
+            databases = {self._db_for_model(typ_cls) for typ_cls in model.get_type_classes()}
+            return databases.pop() if len(databases) == 1 else None
+        for klass in model.__mro__:
+            if issubclass(klass, TypedModel) and not klass._meta.abstract:
+                using = routes.get(klass._meta.label_lower)
+                if using is not None:
+                    return using
+        return None
+
+    def db_for_read(self, model, **hints) -> str | None:
+        instance = hints.get("instance")
+        if isinstance(instance, TypedModel):
+            model = instance.__class__
+        return self._db_for_model(model)
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db: str, app_label: str, model_name: str | None = None, **hints):
+        if model_name is None:
+            return None
+        try:
+            model = apps.get_model(app_label, model_name)
+        except LookupError:
+            return None
+        if not issubclass(model, TypedModel):
+            return None
+        base_class = model.base_class or model
+        databases = {self._db_for_model(typ_cls) for typ_cls in base_class.get_type_classes()}
+        if databases <= {None}:
+            return None
+        return db in {using or DEFAULT_DB_ALIAS for using in databases}
@@ -0,0 +1,149 @@
+"""
+Signals for typed models.
+
+Django sends model signals (``pre_save``, ``post_delete``, ...) with the instance's own class as
+the sender, so a receiver connected with ``sender=Animal`` doesn't receive them for a ``BigCat``.
+``connect_subtree()`` connects a receiver to a typed class and each of its typed subclasses,
+including ones defined later, so Django's per-sender lookup does the filtering.
+"""
+
+import weakref
+from collections import defaultdict
+from collections.abc import Callable, Hashable, Iterable
+from typing import Any, NamedTuple
+
+from django.dispatch import Signal
+
+# Sent after bulk_create() on a typed queryset, once per typed subclass of the created
+# instances, with the arguments ``sender``, ``instances`` and ``using``.
+post_bulk_create = Signal(use_caching=True)
+
+# Sent after bulk_update() on a typed queryset, once per typed subclass of the updated
+# instances, with the arguments ``sender``, ``instances``, ``fields`` and ``using``.
+post_bulk_update = Signal(use_caching=True)
+
+# Sent after update(type=...) on a typed queryset, once per previous typed subclass of the
+# updated rows, with the arguments ``sender`` (the previous class), ``new_class``, ``pks`` and
+# ``using``.
+post_type_change = Signal(use_caching=True)
+
+
+class _SubtreeReceiver(NamedTuple):
+    signal: Signal
+    sender: type
+    receiver: Callable[[], Any]
+    weak: bool
+    dispatch_uid: Hashable | None
+
+
+# The subtree receivers connected to the classes of each typed base model.
+_subtree_receivers: dict[type, list[_SubtreeReceiver]] = defaultdict(list)
+
+
+def _subtree(sender: type) -> list[type]:
+    base_class = getattr(sender, "base_class", None) or sender
+    registry = getattr(base_class, "_typedmodels_registry", None)
+    if registry is None:
+        raise ValueError(f"{sender.__name__} isn't a typed model.")
+    return [
+        sender,
+        *(cls for cls in registry.values() if cls is not sender and issubclass(cls, sender)),
+    ]
+
+
+def connect_subtree(
+    signal: Signal,
+    receiver: Callable,
+    sender: type,
+    weak: bool = True,
+    dispatch_uid: Hashable | None = None,
+) -> None:
+    """
+    Connects ``receiver`` to ``signal`` for ``sender`` (a typed model class) and all of its
+    typed subclasses, as ``Signal.connect()`` would.
+    """
+    classes = _subtree(sender)
+    for cls in classes:
+        signal.connect(receiver, sender=cls, weak=weak, dispatch_uid=dispatch_uid)
+    if not weak:
+        ref: Callable[[], Any] = lambda: receiver  # noqa: E731
+    elif hasattr(receiver, "__self__") and hasattr(receiver, "__func__"):
+        ref = weakref.WeakMethod(receiver)  # type: ignore[arg-type]
+    else:
+        ref = weakref.ref(receiver)
+    base_class = getattr(sender, "base_class", None) or sender
+    _subtree_receivers[base_class].append(_SubtreeReceiver(signal, sender, ref, weak, dispatch_uid))
+
+
+def disconnect_subtree(
+    signal: Signal,
+    receiver: Callable | None = None,
+    sender: type | None = None,
+    dispatch_uid: Hashable | None = None,
+) -> bool:
+    """
+    Disconnects a receiver connected with ``connect_subtree()``. Returns whether it was
+    connected.
+    """
+    if sender is None:
+        raise ValueError("disconnect_subtree() needs the sender passed to connect_subtree().")
+    base_class = getattr(sender, "base_class", None) or sender
+    entries = _subtree_receivers[base_class]
+    for entry in entries:
+        if (
+            entry.signal is signal
+            and entry.sender is sender
+            and (
+                entry.dispatch_uid == dispatch_uid
+                if dispatch_uid is not None
+                else entry.receiver() is receiver
+            )
+        ):
+            entries.remove(entry)
+            break
+    else:
+        return False
+    for cls in _subtree(sender):
+        signal.disconnect(receiver, sender=cls, dispatch_uid=dispatch_uid)
+    return True
+
+
+def subtree_receiver(signal: Signal, sender: type, **kwargs) -> Callable:
+    """
+    A decorator which connects a function with ``connect_subtree()``, like Django's
+    ``@receiver``.
+    """
+
+    def _decorator(func):
+        connect_subtree(signal, func, sender, **kwargs)
+        return func
+
+    return _decorator
+
+
+def _connect_new_subclass(cls: type, base_class: type) -> None:
+    # Called when a typed subclass is defined, to connect the receivers of its superclasses.
+    entries = _subtree_receivers.get(base_class)
+    if not entries:
+        return
+    for entry in list(entries):
+        receiver = entry.receiver()
+        if receiver is None:
+            entries.remove(entry)
+        elif issubclass(cls, entry.sender):
+            entry.signal.connect(
+                receiver, sender=cls, weak=entry.weak, dispatch_uid=entry.dispatch_uid
+            )
+
+
+def _send_per_class(signal: Signal, instances: Iterable[Any], **kwargs) -> None:
+    """
+    Sends ``signal`` once for each class of ``instances``, with the instances of that class.
+    """
+    if not signal.receivers:
+        return
+    by_class: dict[type, list[Any]] = defaultdict(list)
+    for instance in instances:
+        by_class[instance.__class__].append(instance)
+    for cls, cls_instances in by_class.items():
+        signal.send(sender=cls, instances=cls_instances, **kwargs)
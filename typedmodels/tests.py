@@ -1,6 +1,15 @@
+import io
+import json
+import pickle
+
 import pytest
+from django.contrib.admin import AdminSite
+from django.contrib.admin.options import IS_POPUP_VAR
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import DatabaseError, NotSupportedError, models
+from django.db.models.signals import post_save, pre_delete
+from django.test import RequestFactory
+from django.utils.choices import CallableChoiceIterator
 
 try:
     import yaml
@@ -11,7 +20,8 @@ except ImportError:
     PYYAML_AVAILABLE = False
 
 from django.core import serializers
-from django.core.exceptions import FieldError
+from django.core.exceptions import FieldDoesNotExist, FieldError, ValidationError
+from django.core.management import CommandError, call_command
 
 from testapp.models import (
     AbstractVegetable,
@@ -20,18 +30,41 @@ from testapp.models import (
     BaseModelWithIndex,
     BigCat,
     Canine,
+    Car,
+    Child1,
     Child2,
     Employee,
     Feline,
     Fruit,
     Parrot,
+    Polygon,
+    Shape,
+    SportsCar,
     SubModelA,
     SubModelB,
+    SubModelBChild,
+    SubModelC,
+    Truck,
     UniqueIdentifier,
     Vegetable,
+    Vehicle,
 )
 
+from . import columnar, pickling
+from .admin import TypedModelAdmin
+from .forms import typed_modelform_factory, typed_modelformset_factory
+from .identity import identity_map
 from .models import TypedModelManager
+from .query_cache import get_query_cache
+from .routers import TypedModelRouter
+from .signals import (
+    _connect_new_subclass,
+    connect_subtree,
+    disconnect_subtree,
+    post_bulk_create,
+    post_type_change,
+)
+from .type_cache import get_type_cache
 
 
 @pytest.fixture
@@ -482,3 +515,1136 @@ def test_base_model_with_indexes(db):
     assert SubModelA.objects.count() == 1
     assert SubModelB.objects.count() == 1
     assert BaseModelWithIndex.objects.count() == 2
+
+
+def test_split_by_type(animals, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        querysets = Animal.objects.split_by_type()
+    assert list(querysets) == [AngryBigCat, BigCat, Canine, Feline, Parrot]
+    assert [type(obj) for obj in querysets[Feline]] == [Feline, Feline]
+    assert [obj.name for obj in querysets[AngryBigCat]] == ["mufasa"]
+
+    # each queryset only selects the columns its subclass uses
+    sql = str(querysets[Canine].query)
+    assert "mice_eaten" not in sql
+    assert "known_words" not in sql
+    assert "mice_eaten" in str(querysets[Feline].query)
+
+    # filters on the original queryset are preserved
+    assert list(Feline.objects.filter(name="kitteh").split_by_type()) == [Feline]
+
+
+def test_two_phase(animals, django_assert_num_queries):
+    Animal.objects.filter(name="kitteh").update(mice_eaten=3)
+    Parrot.objects.filter(name="Kajtek").update(known_words=50)
+    # one query for the base columns, then one per subclass with columns of its own
+    with django_assert_num_queries(5) as ctx:
+        loaded = list(Animal.objects.two_phase().order_by("name"))
+        assert [(type(a), a.name) for a in loaded] == [
+            (Parrot, "Kajtek"),
+            (Feline, "cheetah"),
+            (Canine, "fido"),
+            (Feline, "kitteh"),
+            (AngryBigCat, "mufasa"),
+            (BigCat, "simba"),
+        ]
+        assert loaded[0].known_words == 50
+        assert loaded[3].mice_eaten == 3
+    assert "mice_eaten" not in ctx.captured_queries[0]["sql"]
+    assert all(not a.get_deferred_fields() for a in loaded)
+
+    # with iterator(), each chunk's subclass columns are loaded before it's yielded
+    # (Parrot and Feline, Feline, then AngryBigCat and BigCat)
+    with django_assert_num_queries(6):
+        names = [a.name for a in Animal.objects.two_phase().order_by("name").iterator(2)]
+    assert names == ["Kajtek", "cheetah", "fido", "kitteh", "mufasa", "simba"]
+
+
+def test_aggregate_by_type(animals, django_assert_num_queries):
+    for name, mice_eaten in [("kitteh", 3), ("cheetah", 1), ("simba", 5), ("mufasa", 7)]:
+        Feline.objects.filter(name=name).update(mice_eaten=mice_eaten)
+
+    with django_assert_num_queries(1):
+        results = Feline.objects.aggregate_by_type(
+            n=models.Count("pk"),
+            mice=models.Sum("mice_eaten"),
+            avg=models.Avg("mice_eaten"),
+            most=models.Max("mice_eaten"),
+        )
+    # each class's results include the rows of its subclasses
+    assert results == {
+        Feline: {"n": 4, "mice": 16, "avg": 4.0, "most": 7},
+        BigCat: {"n": 2, "mice": 12, "avg": 6.0, "most": 7},
+        AngryBigCat: {"n": 1, "mice": 7, "avg": 7.0, "most": 7},
+    }
+    assert list(results) == [AngryBigCat, BigCat, Feline]
+
+    results = Animal.objects.filter(name__in=["kitteh", "Kajtek"]).aggregate_by_type(
+        n=models.Count("pk")
+    )
+    assert results == {Animal: {"n": 2}, Feline: {"n": 1}, Parrot: {"n": 1}}
+
+    with pytest.raises(ValueError):
+        Animal.objects.aggregate_by_type(n=models.Count("name", distinct=True))
+    with pytest.raises(ValueError):
+        Animal.objects.aggregate_by_type(spread=models.StdDev("pk"))
+
+
+def _names(qs):
+    return sorted(obj.name for obj in qs)
+
+
+def test_run_by_type(transactional_db, animals):
+    from .parallel import run_by_type
+
+    results = run_by_type(Feline.objects.all(), _names, max_workers=2)
+    assert results == {
+        AngryBigCat: ["mufasa"],
+        BigCat: ["simba"],
+        Feline: ["cheetah", "kitteh"],
+    }
+
+
+def _unevaluated_names(qs):
+    # The test database is in memory, so a worker process can't query it; check that the
+    # queryset arrived unevaluated instead.
+    return qs._result_cache is None, str(qs.query)
+
+
+def test_run_by_type_processes(transactional_db, animals, django_assert_num_queries):
+    from .parallel import run_by_type
+
+    # Only the query for the types present runs in this process.
+    with django_assert_num_queries(1):
+        results = run_by_type(Feline.objects.all(), _unevaluated_names, processes=True)
+    assert list(results) == [AngryBigCat, BigCat, Feline]
+    for typ_cls, (unevaluated, sql) in results.items():
+        assert unevaluated
+        assert f"= {typ_cls._typedmodels_type}" in sql
+
+
+def test_chunk_ranges(animals):
+    from .parallel import chunk_ranges
+
+    pks = list(Animal.objects.order_by("pk").values_list("pk", flat=True))
+    assert list(chunk_ranges(Animal.objects.all(), 4)) == [(None, pks[3]), (pks[3], pks[5])]
+    assert list(chunk_ranges(Animal.objects.all(), 3)) == [(None, pks[2]), (pks[2], pks[5])]
+    assert list(chunk_ranges(Animal.objects.all(), 3, start_after=pks[5])) == []
+
+
+def test_map_chunks_resumes_from_checkpoint(transactional_db, animals, tmp_path):
+    from .parallel import FileCheckpoint, map_chunks
+
+    checkpoint = FileCheckpoint(tmp_path / "checkpoint.json")
+    results = map_chunks(
+        Animal.objects.order_by("pk"), _names, chunk_size=2, max_workers=2, checkpoint=checkpoint
+    )
+    assert next(results) == ["cheetah", "kitteh"]
+    assert next(results) == ["fido", "simba"]
+    # Simulate a crash before the second chunk was recorded as finished.
+    results.close()
+
+    results = map_chunks(Animal.objects.all(), _names, chunk_size=2, checkpoint=checkpoint)
+    assert list(results) == [["fido", "simba"], ["Kajtek", "mufasa"]]
+    assert checkpoint.load() == Animal.objects.order_by("pk").last().pk
+
+
+def test_map_chunks_max_pending(transactional_db, animals):
+    from .parallel import map_chunks
+
+    calls = []
+
+    def names(qs):
+        calls.append(qs)
+        return _names(qs)
+
+    results = map_chunks(Animal.objects.all(), names, chunk_size=2, max_pending=1)
+    assert next(results) == ["cheetah", "kitteh"]
+    # Only the chunk whose result was needed has been submitted.
+    assert len(calls) == 1
+    assert list(results) == [["fido", "simba"], ["Kajtek", "mufasa"]]
+
+    with pytest.raises(ValueError):
+        next(map_chunks(Animal.objects.all(), names, max_pending=0))
+
+
+def test_map_chunks_processes(transactional_db, animals):
+    from .parallel import map_chunks
+
+    pks = list(Animal.objects.order_by("pk").values_list("pk", flat=True))
+    results = list(
+        map_chunks(Animal.objects.all(), _unevaluated_names, chunk_size=4, processes=True)
+    )
+    assert len(results) == 2
+    # Each chunk reaches its worker unevaluated, limited to its pk range.
+    assert all(unevaluated for unevaluated, sql in results)
+    assert f"<= {pks[3]}" in results[0][1]
+    assert f"> {pks[3]}" in results[1][1]
+
+
+def test_type_resolved_from_class(animals):
+    cats = list(Feline.objects.filter(type="testapp.feline"))
+    assert [cat.type for cat in cats] == ["testapp.feline", "testapp.feline"]
+    assert all("type" not in cat.__dict__ for cat in cats)
+    assert cats[0].type is cats[1].type
+    assert cats[0].get_deferred_fields() == set()
+
+    # new instances don't store it either
+    assert "type" not in Parrot(name="polly").__dict__
+
+    # an explicit change is stored on the instance until the class catches up
+    cat = cats[0]
+    cat.type = "testapp.bigcat"
+    assert cat.type == "testapp.bigcat"
+    assert "type" in cat.__dict__
+    cat.recast()
+    assert type(cat) is BigCat
+    assert "type" not in cat.__dict__
+    cat.save()
+    assert BigCat.objects.filter(pk=cat.pk).exists()
+
+
+def test_type_resolved_from_db_when_deferred(animals):
+    # the row might be a subclass of the queryset's model, so `type` is loaded lazily
+    bigcat = Feline.objects.only("id").get(name="simba")
+    assert type(bigcat) is Feline
+    assert bigcat.get_deferred_fields() == {"type", "name", "mice_eaten"}
+    assert bigcat.type == "testapp.bigcat"
+
+
+def test_unique_checks_cached_per_class(db):
+    child2 = Child2(a="a")
+    unique_checks, _date_checks = child2._get_unique_checks()
+    # Child1.b is unique, but isn't a field on Child2
+    assert all("b" not in field_names for _model_class, field_names in unique_checks)
+    assert ("b",) in [field_names for _model_class, field_names in Child1()._get_unique_checks()[0]]
+
+    unique_checks.clear()
+    assert child2._get_unique_checks()[0] != []
+    assert Child2._meta._typedmodels_unique_checks is not Child1._meta._typedmodels_unique_checks
+
+
+def test_validate_unique_many(db, django_assert_num_queries):
+    target = Child1.objects.create(a="t")
+    other = Child1.objects.create(a="o")
+    existing = Child1.objects.create(a="e", b=target)
+
+    instances = [
+        existing,  # doesn't conflict with itself
+        Child1(a="1", b=target),  # conflicts with `existing`
+        Child1(a="2", b=other),
+        Child1(a="3", b=other),  # conflicts with the previous instance
+        Child2(a="4"),
+        Child1(a="5", b_id=str(other.pk)),  # conflicts with instances[2] once it's an int
+    ]
+    with django_assert_num_queries(1):
+        errors = Child1.validate_unique_many(instances)
+    assert sorted(errors) == [1, 3, 5]
+    assert list(errors[1].message_dict) == ["b"]
+
+    # the same as validate_unique(), apart from duplicates within the batch
+    with pytest.raises(ValidationError):
+        instances[1].validate_unique()
+    instances[3].validate_unique()
+
+
+def test_hierarchical_types(db):
+    assert Car._typedmodels_type == "testapp.car/"
+    assert SportsCar._typedmodels_type == "testapp.car/testapp.sportscar/"
+    assert set(Vehicle.get_types()) == {
+        "testapp.car/",
+        "testapp.car/testapp.sportscar/",
+        "testapp.truck/",
+    }
+
+    car = Car.objects.create(name="mini")
+    sports_car = Vehicle.objects.create(name="zoom", type="testapp.sportscar")
+    assert type(sports_car) is SportsCar
+    assert sports_car.type == "testapp.car/testapp.sportscar/"
+    truck = Truck.objects.create(name="big", towed_car=car)
+
+    # subtrees are filtered by prefix, not by listing every type
+    sql = str(Car.objects.all().query)
+    assert " IN " not in sql
+    assert " LIKE " in sql
+    assert set(Car.objects.all()) == {car, sports_car}
+    assert list(SportsCar.objects.all()) == [sports_car]
+    assert set(Vehicle.objects.all()) == {car, sports_car, truck}
+    assert Truck._meta.get_field("towed_car").get_limit_choices_to() == {
+        "type__startswith": "testapp.car/"
+    }
+
+    # short names still work
+    car.recast("testapp.sportscar")
+    assert type(car) is SportsCar
+    assert car.type == "testapp.car/testapp.sportscar/"
+    assert Vehicle._typedmodels_registry["testapp.truck"] is Truck
+
+
+def _run_operation(operation, backwards=False):
+    from django.apps import apps
+    from django.db import connection
+    from django.db.migrations.state import ProjectState
+
+    state = ProjectState.from_apps(apps)
+    with connection.schema_editor(atomic=False) as editor:
+        if backwards:
+            operation.database_backwards("testapp", editor, state, state)
+        else:
+            operation.database_forwards("testapp", editor, state, state)
+
+
+def test_rename_type_operation(transactional_db, animals, monkeypatch):
+    from .operations import RenameTypedModelType
+
+    # Pretend Canine used to be called Dog, and some rows still say so.
+    monkeypatch.setattr(Animal, "_type_aliases", {"testapp.dog": "testapp.canine"})
+    monkeypatch.setitem(Animal._typedmodels_registry.aliases, "testapp.dog", "testapp.canine")
+    Animal.objects.filter(name="fido").update(type="testapp.dog")
+    fido = Animal.objects.get(name="fido")
+    assert type(fido) is Canine
+    assert fido.type == "testapp.canine"
+    # the subclass managers accept both values while the rows are rewritten
+    assert list(Canine.objects.all()) == [fido]
+    assert list(Feline.objects.filter(name="fido")) == []
+
+    operation = RenameTypedModelType("Animal", "testapp.dog", "testapp.canine", batch_size=1)
+    _run_operation(operation)
+    assert Animal.objects.filter(type="testapp.dog").count() == 0
+    assert list(Canine.objects.all()) == [fido]
+
+    _run_operation(operation, backwards=True)
+    assert Animal.objects.filter(type="testapp.dog").get() == fido
+    assert operation.deconstruct() == (
+        "RenameTypedModelType",
+        [],
+        {
+            "model_name": "Animal",
+            "old_type": "testapp.dog",
+            "new_type": "testapp.canine",
+            "batch_size": 1,
+        },
+    )
+
+
+def test_merge_types_operation(transactional_db, animals):
+    from django.db.migrations.exceptions import IrreversibleError
+
+    from .operations import MergeTypedModelTypes
+
+    operation = MergeTypedModelTypes(
+        "Animal", ["testapp.bigcat", "testapp.angrybigcat"], "testapp.feline", batch_size=1
+    )
+    _run_operation(operation)
+    assert sorted(Feline.objects.values_list("type", flat=True)) == ["testapp.feline"] * 4
+    assert Feline.objects.count() == 4
+
+    with pytest.raises(IrreversibleError):
+        _run_operation(operation, backwards=True)
+
+
+def test_typed_model_views(transactional_db, animals):
+    from django.db import connection
+
+    from .operations import CreateTypedModelView, DeleteTypedModelView, get_view_definitions
+
+    views = get_view_definitions(Animal)
+    assert views["testapp_bigcat"] == {
+        "types": ["testapp.angrybigcat", "testapp.bigcat"],
+        "columns": ["id", "type", "name", "mice_eaten"],
+    }
+    assert views["testapp_canine"]["columns"] == ["id", "type", "name"]
+
+    operation = CreateTypedModelView("Animal", "testapp_feline", **views["testapp_feline"])
+    _run_operation(operation)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT * FROM testapp_feline ORDER BY name")
+        assert [column[0] for column in cursor.description] == views["testapp_feline"]["columns"]
+        assert [row[2] for row in cursor.fetchall()] == ["cheetah", "kitteh", "mufasa", "simba"]
+    _run_operation(DeleteTypedModelView("Animal", "testapp_feline", **views["testapp_feline"]))
+    assert "testapp_feline" not in connection.introspection.table_names(include_views=True)
+
+    # the command writes a migration with the views missing from the app's migrations
+    out = io.StringIO()
+    call_command("typedmodels_views", "testapp", dry_run=True, stdout=out)
+    assert "Create view testapp_feline of Animal" in out.getvalue()
+    with pytest.raises(SystemExit):
+        call_command("typedmodels_views", "testapp", check=True, stdout=io.StringIO())
+
+
+def test_lazy_types(db):
+    import sys
+
+    Polygon.objects.create(name="square")
+    Polygon.objects.create(name="triangle")
+    Shape.objects.filter(name="triangle").update(type="testapp.triangle")
+
+    # the types are known before their classes are imported
+    assert "testapp.lazy_models" not in sys.modules
+    assert Shape.get_types() == ["testapp.polygon", "testapp.circle", "testapp.triangle"]
+    assert Polygon.get_types() == ["testapp.polygon", "testapp.triangle"]
+    assert Polygon.objects.count() == 2
+    assert "testapp.lazy_models" not in sys.modules
+
+    # loading a row of a lazy type imports its class
+    triangle = Shape.objects.get(name="triangle")
+    from testapp.lazy_models import Circle, Triangle
+
+    assert type(triangle) is Triangle
+    assert type(Shape(type="testapp.circle")) is Circle
+    assert set(Shape.get_type_classes()) == {Polygon, Circle, Triangle}
+
+
+def _run_in_new_process(script):
+    # Whether the lazy classes have been imported is the point of these tests, so they run in
+    # a process which hasn't imported them yet.
+    import os
+    import subprocess
+    import sys
+    import textwrap
+    from pathlib import Path
+
+    script = "import django\n\ndjango.setup()\n" + textwrap.dedent(script)
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": "test_settings"},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+@pytest.mark.parametrize("import_first", [False, True])
+def test_lazy_types_migrations(import_first):
+    stdout = _run_in_new_process(f"""
+        from django.core.management import call_command
+
+        if {import_first}:
+            import testapp.lazy_models
+        from testapp.models import Shape
+        from typedmodels.operations import get_view_definitions
+
+        call_command("makemigrations", "testapp", dry_run=True)
+        print(sorted(get_view_definitions(Shape)))
+    """)
+    # the lazy classes' proxy models are in the migrations, whatever has been imported
+    assert "Circle" not in stdout
+    assert "Triangle" not in stdout
+    assert "'testapp_circle'" in stdout
+    assert "'testapp_triangle'" in stdout
+
+
+@pytest.mark.parametrize(
+    "check",
+    [
+        # the router accounts for the lazy subclasses, which aren't routed with Polygon
+        """
+        from django.test import override_settings
+        from typedmodels.routers import TypedModelRouter
+
+        with override_settings(TYPEDMODELS_DATABASES={"testapp.polygon": "other"}):
+            assert TypedModelRouter().db_for_read(Shape) is None
+        """,
+        # fields of lazy subclasses can be exported
+        """
+        from typedmodels import columnar
+
+        batches = dict(columnar.iter_record_batches(Shape.objects.all(), fields=["radius"]))
+        assert batches[registry["testapp.circle"]].column("radius").to_pylist() == [2.0]
+        """,
+        # rows of lazy types are in the type dictionary
+        """
+        from typedmodels import columnar
+
+        batches = dict(columnar.iter_record_batches(Shape.objects.all()))
+        assert batches[registry["testapp.circle"]].column("type").to_pylist() == ["testapp.circle"]
+        """,
+    ],
+    ids=["router", "fields", "type_dictionary"],
+)
+def test_lazy_types_not_imported(check):
+    pytest.importorskip("pyarrow")
+    _run_in_new_process(
+        """
+        import sys
+
+        from django.core.management import call_command
+        from testapp.models import Polygon, Shape
+
+        call_command("migrate", verbosity=0)
+        Polygon.objects.create(name="circle")
+        Shape.objects.update(type="testapp.circle", attributes={"radius": 2})
+        assert "testapp.lazy_models" not in sys.modules
+        registry = Shape._typedmodels_registry
+        """
+        + check
+    )
+
+
+def test_json_fields(db):
+    import datetime
+
+    assert "top_speed" not in Vehicle._meta.fields_from_subclasses
+    assert set(SportsCar._meta.json_fields) == {"top_speed", "first_registered", "convertible"}
+    assert not hasattr(Car(), "top_speed")
+
+    car = SportsCar.objects.create(
+        name="zoom", top_speed=300, first_registered=datetime.date(2020, 1, 31)
+    )
+    assert car.attributes == {"top_speed": 300, "first_registered": "2020-01-31"}
+
+    car = SportsCar.objects.get(pk=car.pk)
+    assert car.top_speed == 300
+    assert car.first_registered == datetime.date(2020, 1, 31)
+    assert car.convertible is False
+
+    car.top_speed = "310"  # converted by the field
+    car.save()
+    assert SportsCar.objects.get(pk=car.pk).top_speed == 310
+    assert list(Vehicle.objects.filter(attributes__top_speed=310)) == [car]
+
+
+def test_json_fields_errors():
+    with pytest.raises(FieldError):
+
+        class Bicycle(Animal):
+            _json_fields = True
+            wheels = models.IntegerField(null=True)
+
+    with pytest.raises(FieldError):
+
+        class Scooter(Vehicle):
+            _json_fields = ["wheels"]
+
+
+def test_json_fields_clean(db):
+    car = SportsCar(name="z", top_speed="fast")
+    with pytest.raises(ValidationError) as excinfo:
+        car.full_clean()
+    assert set(excinfo.value.message_dict) == {"top_speed", "first_registered"}
+    with pytest.raises(ValidationError) as excinfo:
+        car.full_clean(exclude=["first_registered"])
+    assert set(excinfo.value.message_dict) == {"top_speed"}
+
+    car = SportsCar(name="z", top_speed=300, first_registered="2020-01-31")
+    car.full_clean()
+    assert car.attributes == {"top_speed": 300, "first_registered": "2020-01-31"}
+
+
+def test_side_table_fields(db, django_assert_num_queries):
+    TruckSideTable = Truck._meta.side_table_model
+    assert "manual" not in [f.name for f in Vehicle._meta.fields]
+
+    truck = Truck.objects.create(name="big", manual="Drive carefully")
+    assert TruckSideTable.objects.get(pk=truck.pk).manual == "Drive carefully"
+    # only touched side tables are saved
+    truck.name = "bigger"
+    with django_assert_num_queries(1):
+        truck.save()
+
+    truck = Truck.objects.get(pk=truck.pk)
+    with django_assert_num_queries(1):
+        assert truck.manual == "Drive carefully"
+        assert truck.manual == "Drive carefully"
+
+    truck.manual = "Drive very carefully"
+    truck.save(update_fields=["manual"])
+    assert TruckSideTable.objects.get(pk=truck.pk).manual == "Drive very carefully"
+
+    # rows saved before the side table existed read as defaults
+    TruckSideTable.objects.all().delete()
+    assert Truck.objects.get(pk=truck.pk).manual == ""
+
+    truck.delete()
+    assert not TruckSideTable.objects.exists()
+
+
+def test_side_table_pickle(db, django_assert_num_queries):
+    Truck.objects.create(name="big", manual="Drive carefully")
+
+    truck = Truck.objects.get(name="big")
+    assert truck.manual == "Drive carefully"
+    truck = pickle.loads(pickle.dumps(truck))
+    with django_assert_num_queries(0):
+        assert truck.manual == "Drive carefully"
+
+    # side table rows loaded with the results are cached with them
+    assert [t.manual for t in Truck.objects.with_side_tables().cached()] == ["Drive carefully"]
+    with django_assert_num_queries(0):
+        trucks = list(Truck.objects.with_side_tables().cached())
+        assert [t.manual for t in trucks] == ["Drive carefully"]
+
+
+def test_side_table_refresh(db, django_assert_num_queries):
+    TruckSideTable = Truck._meta.side_table_model
+    truck = Truck.objects.create(name="big", manual="Drive carefully")
+    TruckSideTable.objects.update(manual="Stop")
+    assert truck.manual == "Drive carefully"
+    truck.refresh_from_db()
+    assert truck.manual == "Stop"
+
+    TruckSideTable.objects.update(manual="Go")
+    with django_assert_num_queries(0):
+        truck.refresh_from_db(fields=["manual"])
+    assert truck.manual == "Go"
+
+    sports_car = SportsCar.objects.create(name="zoom", top_speed=200)
+    SportsCar.objects.update(attributes={"top_speed": 300})
+    sports_car.refresh_from_db(fields=["top_speed"])
+    assert sports_car.top_speed == 300
+
+
+def test_side_table_save_is_atomic(transactional_db, monkeypatch):
+    TruckSideTable = Truck._meta.side_table_model
+
+    def save(self, *args, **kwargs):
+        raise DatabaseError("no room")
+
+    monkeypatch.setattr(TruckSideTable, "save", save)
+    with pytest.raises(DatabaseError):
+        Truck.objects.create(name="big", manual="Drive carefully")
+    assert not Truck.objects.exists()
+
+
+def test_with_side_tables(db, django_assert_num_queries):
+    for i in range(3):
+        Truck.objects.create(name=f"truck{i}", manual=f"manual{i}")
+    Car.objects.create(name="car")
+
+    with django_assert_num_queries(2):
+        vehicles = list(Vehicle.objects.with_side_tables().order_by("pk"))
+        assert [v.manual for v in vehicles if isinstance(v, Truck)] == [
+            "manual0",
+            "manual1",
+            "manual2",
+        ]
+
+
+def test_typedmodels_inspect(animals):
+    out = io.StringIO()
+    call_command("typedmodels_inspect", "testapp.Feline", "--json", stdout=out)
+    [report] = json.loads(out.getvalue())
+    assert report["model"] == "testapp.Animal"
+    assert report["rows"] == 6
+    assert {typ: info["rows"] for typ, info in report["types"].items()} == {
+        "testapp.feline": 2,
+        "testapp.canine": 1,
+        "testapp.bigcat": 1,
+        "testapp.angrybigcat": 1,
+        "testapp.parrot": 1,
+    }
+    assert report["types"]["testapp.parrot"]["null_fraction"]["known_words"] == 1.0
+    assert [w["column"] for w in report["warnings"] if w["kind"] == "sparse_column"] == [
+        "known_words"
+    ]
+
+    out = io.StringIO()
+    call_command("typedmodels_inspect", "testapp.Animal", "--sample", "2", "--json", stdout=out)
+    [report] = json.loads(out.getvalue())
+    assert report["sampled"] and report["rows"] == 2
+
+    with pytest.raises(CommandError):
+        call_command("typedmodels_inspect", "testapp.UniqueIdentifier")
+
+
+def test_typedmodels_inspect_index_warnings(db):
+    assert [index.name for index in SubModelC._meta.dropped_indexes] == ["submodelc_name"]
+
+    out = io.StringIO()
+    call_command(
+        "typedmodels_inspect", "testapp.BaseModelWithIndex", "testapp.Truck", "--json", stdout=out
+    )
+    base_report, vehicle_report = json.loads(out.getvalue())
+    assert {(w["kind"], w.get("index")) for w in base_report["warnings"]} == {
+        ("dropped_index", "submodelc_name")
+    }
+    # only trucks use the towed_car FK's index
+    assert [
+        w["columns"] for w in vehicle_report["warnings"] if w["kind"] == "single_type_index"
+    ] == [["towed_car_id"]]
+
+
+def test_identity_map(animals):
+    kitteh_pk = Feline.objects.get(name="kitteh").pk
+    assert Animal.objects.get(pk=kitteh_pk) is not Animal.objects.get(pk=kitteh_pk)
+
+    with identity_map():
+        kitteh = Animal.objects.only("type", "name").get(pk=kitteh_pk)
+        assert isinstance(kitteh, Feline)
+        assert Feline.objects.get(name="kitteh") is kitteh
+        assert UniqueIdentifier.objects.get(name="kitteh").referent is kitteh
+        # fields deferred the first time are filled in by the later query
+        assert "mice_eaten" in vars(kitteh)
+
+        kitteh.name = "kitty"
+        assert Animal.objects.get(pk=kitteh_pk).name == "kitty"
+        kitteh.refresh_from_db()
+        assert kitteh.name == "kitteh"
+
+        Animal.objects.filter(pk=kitteh_pk).update(name="kitty")
+        reloaded = Animal.objects.get(pk=kitteh_pk)
+        assert reloaded is not kitteh and reloaded.name == "kitty"
+
+        new = Feline(pk=kitteh_pk, name="cat")
+        new.save()
+        assert Animal.objects.get(pk=kitteh_pk) is new
+
+
+def test_identity_map_lru(animals):
+    with identity_map(max_size=2) as objects:
+        first, *rest = Animal.objects.order_by("pk")
+        assert len(objects) == 2
+        assert Animal.objects.get(pk=first.pk) is not first
+        assert Animal.objects.get(pk=rest[-1].pk) is rest[-1]
+
+
+def test_get_type_for(animals, django_assert_num_queries):
+    get_type_cache().clear()
+    kitteh = Animal.objects.get(name="kitteh")
+    fido = Animal.objects.get(name="fido")
+
+    with django_assert_num_queries(1):
+        assert Animal.objects.get_types_for([kitteh.pk, str(fido.pk), 0]) == {
+            kitteh.pk: Feline,
+            fido.pk: Canine,
+        }
+    with django_assert_num_queries(0):
+        assert Animal.objects.get_type_for(str(kitteh.pk)) is Feline
+        assert Feline.objects.get_types_for([kitteh.pk, fido.pk]) == {kitteh.pk: Feline}
+        with pytest.raises(Feline.DoesNotExist):
+            Feline.objects.get_type_for(fido.pk)
+
+    kitteh.recast(BigCat)
+    kitteh.save()
+    assert Animal.objects.get_type_for(kitteh.pk) is BigCat
+    Animal.objects.filter(pk=kitteh.pk).update(type="testapp.canine")
+    assert Animal.objects.get_type_for(kitteh.pk) is Canine
+    fido.delete()
+    with pytest.raises(Animal.DoesNotExist):
+        Animal.objects.get_type_for(fido.pk)
+
+
+def test_type_cache_unused(animals, monkeypatch):
+    from . import type_cache
+
+    # Writes don't touch the cache unless it's shared or has been used by this process.
+    monkeypatch.setattr(type_cache._cache, "local", None)
+    Animal.objects.create(name="rex", type="testapp.canine")
+    Animal.objects.filter(name="rex").update(type="testapp.feline")
+    Animal.objects.filter(name="rex").delete()
+    Animal.objects.get(name="kitteh").delete()
+    assert type_cache._cache.local is None
+
+
+def test_query_cache_unused(animals, monkeypatch):
+    from . import query_cache
+
+    # Writes don't touch the cache unless it's shared or has been used by this process.
+    monkeypatch.setattr(query_cache._cache, "local", None)
+    rex = Canine.objects.create(name="rex")
+    rex.save()
+    Animal.objects.bulk_create([Parrot(name="polly")])
+    Animal.objects.bulk_update([rex], ["name"])
+    Animal.objects.filter(name="rex").update(type="testapp.feline")
+    Animal.objects.filter(name="polly").delete()
+    Animal.objects.get(name="kitteh").delete()
+    assert query_cache._cache.local is None
+
+
+def test_cached_queryset(animals, django_assert_num_queries):
+    get_query_cache().clear()
+    felines = Feline.objects.cached().order_by("name")
+    names = [a.name for a in felines]
+    with django_assert_num_queries(0):
+        felines = list(Feline.objects.cached().order_by("name"))
+        assert [a.name for a in felines] == names
+        assert isinstance(felines[names.index("simba")], BigCat)
+
+    # Writing rows of other types doesn't invalidate the cached results.
+    Canine.objects.get(name="fido").save()
+    Parrot.objects.create(name="polly")
+    with django_assert_num_queries(0):
+        list(Feline.objects.cached().order_by("name"))
+
+    BigCat.objects.get(name="simba").delete()
+    with django_assert_num_queries(1):
+        assert len(Feline.objects.cached().order_by("name")) == len(names) - 1
+
+    # Recasting invalidates results containing the row as its old type.
+    fido = Canine.objects.get(name="fido")
+    assert len(Canine.objects.cached()) == 1
+    fido.recast(Feline)
+    fido.save()
+    with django_assert_num_queries(1):
+        assert len(Canine.objects.cached()) == 0
+
+
+def test_subtree_signals(animals):
+    received = []
+
+    def on_save(sender, instance, **kwargs):
+        received.append(instance.name)
+
+    connect_subtree(post_save, on_save, sender=Feline)
+    connect_subtree(post_save, on_save, sender=SubModelB)
+    try:
+        # As if SubModelBChild were defined after connecting.
+        post_save.disconnect(on_save, sender=SubModelBChild)
+        _connect_new_subclass(SubModelBChild, BaseModelWithIndex)
+
+        Canine.objects.create(name="rex")
+        for name in ["kitteh", "simba", "mufasa"]:
+            Feline.objects.get(name=name).save()
+        SubModelA.objects.create(name="a", tag="a")
+        SubModelBChild.objects.create(name="b", tag="b")
+        assert received == ["kitteh", "simba", "mufasa", "b"]
+    finally:
+        assert disconnect_subtree(post_save, on_save, sender=Feline)
+        assert disconnect_subtree(post_save, on_save, sender=SubModelB)
+    Feline.objects.get(name="kitteh").save()
+    assert len(received) == 4
+
+
+def test_bulk_signals(animals):
+    received = []
+
+    def on_signal(signal, sender, **kwargs):
+        received.append((signal, sender, kwargs))
+
+    post_bulk_create.connect(on_signal)
+    post_type_change.connect(on_signal)
+    try:
+        Animal.objects.bulk_create([Parrot(name="polly"), Canine(name="rex"), Parrot(name="kea")])
+        Animal.objects.filter(name__in=["polly", "rex"]).update(type="testapp.feline")
+    finally:
+        post_bulk_create.disconnect(on_signal)
+        post_type_change.disconnect(on_signal)
+
+    polly, rex, kea = received[0][2]["instances"] + received[1][2]["instances"]
+    assert [(signal, sender) for signal, sender, _ in received] == [
+        (post_bulk_create, Parrot),
+        (post_bulk_create, Canine),
+        (post_type_change, Parrot),
+        (post_type_change, Canine),
+    ]
+    assert [p.name for p in received[0][2]["instances"]] == ["polly", "kea"]
+    assert received[2][2] == {"new_class": Feline, "pks": [polly.pk], "using": "default"}
+
+
+def test_typed_delete(animals, django_assert_num_queries):
+    mufasa = AngryBigCat.objects.get(name="mufasa")
+    mufasa.canines_eaten.add(Canine.objects.get(name="fido"))
+
+    # Parrots can't have canines_eaten, so its through table isn't queried.
+    with django_assert_num_queries(3) as ctx:
+        assert Parrot.objects.all().delete() == (
+            2,
+            {"testapp.UniqueIdentifier": 1, "testapp.Parrot": 1},
+        )
+    assert not any("canines_eaten" in query["sql"] for query in ctx.captured_queries)
+    deleted, deleted_per_model = Animal.objects.filter(name="mufasa").delete()
+    assert deleted_per_model["testapp.Animal_canines_eaten"] == 1
+
+    # Without cascades or signals, rows are deleted with a single DELETE.
+    SubModelA.objects.create(name="a", tag="a")
+    SubModelB.objects.create(name="b", tag="b")
+    pre_delete.connect(_noop_receiver, sender=SubModelB)
+    try:
+        with django_assert_num_queries(1):
+            assert SubModelA.objects.all().delete() == (1, {"testapp.SubModelA": 1})
+        # Finds that there's a SubModelB row, so deletes via the Collector to send signals.
+        with django_assert_num_queries(3):
+            assert BaseModelWithIndex.objects.all().delete() == (1, {"testapp.SubModelB": 1})
+    finally:
+        pre_delete.disconnect(_noop_receiver, sender=SubModelB)
+
+
+def _noop_receiver(**kwargs):
+    pass
+
+
+def test_typed_modelformset(animals, django_assert_num_queries):
+    assert typed_modelform_factory(Feline, fields=["name"]) is typed_modelform_factory(
+        Feline, fields=["name"]
+    )
+    AnimalFormSet = typed_modelformset_factory(Animal, fields=["name", "mice_eaten", "known_words"])
+    formset = AnimalFormSet(queryset=Animal.objects.order_by("pk"))
+    with django_assert_num_queries(1):
+        forms = {form.instance.name: form for form in formset.initial_forms}
+    assert list(forms["kitteh"].fields) == ["name", "mice_eaten", "id"]
+    assert list(forms["fido"].fields) == ["name", "id"]
+    assert list(forms["Kajtek"].fields) == ["name", "known_words", "id"]
+    # One form class per type, sharing the form fields of the fields they have in common.
+    assert type(forms["kitteh"]) is type(forms["cheetah"])
+    assert type(forms["kitteh"]).base_fields["name"] is type(forms["fido"]).base_fields["name"]
+
+    data = {
+        "form-TOTAL_FORMS": str(len(forms)),
+        "form-INITIAL_FORMS": str(len(forms)),
+    }
+    for form in forms.values():
+        data.update({bf.html_name: "" if bf.value() is None else bf.value() for bf in form})
+    data[forms["kitteh"]["mice_eaten"].html_name] = "3"
+    data[forms["Kajtek"]["known_words"].html_name] = "12"
+    formset = AnimalFormSet(data, queryset=Animal.objects.order_by("pk"))
+    assert formset.is_valid(), formset.errors
+    formset.save()
+    assert Feline.objects.get(name="kitteh").mice_eaten == 3
+    assert Parrot.objects.get(name="Kajtek").known_words == 12
+
+
+def test_typed_modelform_type_choices():
+    form_class = typed_modelform_factory(Animal, fields=["type", "name"])
+    # Built when rendered, rather than copied into each form.
+    assert isinstance(form_class().fields["type"].choices, CallableChoiceIterator)
+    assert ("testapp.canine", "canine") in form_class().fields["type"].choices
+
+
+def test_admin_lookup_search(animals, django_assert_num_queries):
+    get_query_cache().clear()
+
+    class AnimalAdmin(TypedModelAdmin):
+        search_fields = ["name"]
+        lookup_search_limit = 2
+
+    model_admin = AnimalAdmin(Animal, AdminSite())
+    popup = RequestFactory().get("/", {IS_POPUP_VAR: "1"})
+    felines = Animal.objects.filter(type__in=Feline.get_types())
+
+    def search(term):
+        queryset, _ = model_admin.get_search_results(popup, felines, term)
+        return sorted(animal.name for animal in queryset)
+
+    with django_assert_num_queries(3):  # prefix matches, other matches, and the results
+        assert search("s") == ["mufasa", "simba"]
+    with django_assert_num_queries(1):
+        assert search("s") == ["mufasa", "simba"]
+
+    # Saving a Feline invalidates the cached results. Names starting with the term come first.
+    Feline.objects.create(name="sabre")
+    with django_assert_num_queries(2):
+        assert search("s") == ["sabre", "simba"]
+
+    # Other searches aren't limited.
+    queryset, _ = model_admin.get_search_results(RequestFactory().get("/"), felines, "s")
+    assert len(queryset) == 3
+
+
+def test_typed_raw(animals, django_assert_num_queries):
+    sql = """
+        WITH ranked AS (
+            SELECT *, ROW_NUMBER() OVER (PARTITION BY type ORDER BY name) AS type_rank
+            FROM testapp_animal
+        )
+        SELECT id, type, name, mice_eaten, type_rank FROM ranked ORDER BY name
+    """
+    with django_assert_num_queries(1):
+        loaded = list(Animal.objects.typed_raw(sql, chunk_size=2))
+        assert [(type(a), a.name, a.type_rank) for a in loaded] == [
+            (Parrot, "Kajtek", 1),
+            (Feline, "cheetah", 1),
+            (Canine, "fido", 1),
+            (Feline, "kitteh", 2),
+            (AngryBigCat, "mufasa", 1),
+            (BigCat, "simba", 1),
+        ]
+        assert loaded[3].mice_eaten == 0
+    assert loaded[0].get_deferred_fields() == {"known_words"}
+
+    with pytest.raises(FieldDoesNotExist):
+        list(Animal.objects.typed_raw("SELECT id, name FROM testapp_animal"))
+
+
+@pytest.fixture
+def routed_felines(settings):
+    settings.DATABASE_ROUTERS = ["typedmodels.routers.TypedModelRouter"]
+    settings.TYPEDMODELS_DATABASES = {"testapp.Feline": "other"}
+
+
+@pytest.mark.django_db(databases=["default", "other"])
+def test_typed_model_router(routed_felines, django_assert_num_queries):
+    from .models import _routed_databases
+
+    Animal.objects.bulk_create(
+        [
+            Canine(name="fido"),
+            Feline(name="kitteh"),
+            BigCat(name="simba"),
+            Parrot(name="Kajtek"),
+        ]
+    )
+    Feline.objects.create(name="cheetah")
+    assert _names(Animal.objects.using("other")) == ["cheetah", "kitteh", "simba"]
+    assert _names(Animal.objects.using("default")) == ["Kajtek", "fido"]
+    assert Feline.objects.db == "other"
+    assert TypedModelRouter().allow_migrate("other", "testapp", "animal")
+    assert TypedModelRouter().allow_migrate("other", "testapp", "vehicle") is None
+
+    # results from both databases are merged in order
+    assert [a.name for a in Animal.objects.order_by("name")] == [
+        "Kajtek",
+        "cheetah",
+        "fido",
+        "kitteh",
+        "simba",
+    ]
+    assert [a.name for a in Animal.objects.order_by("-name")[1:3]] == ["kitteh", "fido"]
+    assert [a.name for a in Animal.objects.order_by("name").iterator()][:2] == [
+        "Kajtek",
+        "cheetah",
+    ]
+    assert list(Animal.objects.order_by("name").values_list("name", flat=True)[:2]) == [
+        "Kajtek",
+        "cheetah",
+    ]
+    assert [row["name"] for row in Animal.objects.order_by("-name").values("name")][:2] == [
+        "simba",
+        "kitteh",
+    ]
+    with pytest.raises(NotSupportedError):
+        # The rows can't be merged in name order without their names.
+        list(Animal.objects.order_by("name").values_list("pk"))
+    # the databases of each class are only worked out once
+    misses = _routed_databases.cache_info().misses
+    assert Animal.objects.count() == Animal.objects.filter(name__gt="").count()
+    assert _routed_databases.cache_info().misses == misses
+    assert Animal.objects.count() == 5
+    assert Animal.objects.order_by("pk")[1:].count() == 4
+    assert Animal.objects.filter(name="simba").exists()
+    simba = Animal.objects.get(name="simba")
+    assert isinstance(simba, BigCat) and simba._state.db == "other"
+    with django_assert_num_queries(1, using="other"):
+        assert _names(Feline.objects.all()) == ["cheetah", "kitteh", "simba"]
+
+    simba.name = "mufasa"
+    simba.save()
+    assert BigCat.objects.get().name == "mufasa"
+    assert Animal.objects.update(name="animal") == 5
+    assert Animal.objects.all().delete()[0] == 5
+    assert not Animal.objects.using("other").exists()
+
+
+def test_typed_generic_foreign_key_prefetch(animals, django_assert_num_queries):
+    kitteh = Animal.objects.get(name="kitteh")
+    # the row changed type after the content type was stored
+    kitteh.recast(BigCat)
+    kitteh.save()
+
+    with django_assert_num_queries(2):
+        identifiers = list(UniqueIdentifier.objects.prefetch_related("referent").order_by("pk"))
+        assert [(i.name, i.referent.__class__) for i in identifiers] == [
+            ("kitteh", BigCat),
+            ("cheetah", Feline),
+            ("fido", Canine),
+            ("simba", BigCat),
+            ("mufasa", AngryBigCat),
+            ("kajtek", Parrot),
+        ]
+        assert all(i.referent.name.lower() == i.name for i in identifiers)
+
+
+def test_compact_pickling(animals):
+    kitteh = Animal.objects.get(name="kitteh")
+    kitteh.mice_eaten = 3
+    data = pickling.dumps(kitteh)
+    assert len(data) < len(pickle.dumps(models.Model.__reduce__(kitteh), pickle.HIGHEST_PROTOCOL))
+
+    loaded = pickling.loads(data)
+    assert type(loaded) is Feline
+    assert (loaded.pk, loaded.name, loaded.mice_eaten, loaded.type) == (
+        kitteh.pk,
+        "kitteh",
+        3,
+        "testapp.feline",
+    )
+    assert not loaded._state.adding and loaded._state.db == "default"
+    loaded.save()
+    assert Feline.objects.get(pk=kitteh.pk).mice_eaten == 3
+
+    # other subclasses' fields, which instances built through the base class carry, are left out
+    parrot = Animal(type="testapp.parrot", name="polly", known_words=3)
+    assert "mice_eaten" in vars(parrot)
+    data = pickling.dumps(parrot)
+    assert b"mice_eaten" not in data
+    loaded = pickling.loads(data)
+    assert loaded._state.adding and loaded.known_words == 3
+
+    # deferred fields fall back to Django's pickling
+    deferred = Animal.objects.defer("name").get(pk=kitteh.pk)
+    assert pickling.loads(pickling.dumps(deferred)).name == "kitteh"
+
+    # pickles from before the class's fields changed load what they can
+    unpickle, args = kitteh.__reduce__()
+    assert args[2] == ("id", "name", "mice_eaten")
+    loaded = unpickle(args[0], args[1], ("id", "name", "whiskers"), (kitteh.pk, "tom", 12))
+    assert (loaded.pk, loaded.name) == (kitteh.pk, "tom")
+    assert not hasattr(loaded, "whiskers")
+    assert loaded.get_deferred_fields() == {"mice_eaten"}
+    assert loaded.mice_eaten == 3
+
+
+def test_copy(db):
+    import copy
+
+    car = Car.objects.create(name="mini")
+    truck = Truck.objects.create(name="big", towed_car=car)
+    truck = Vehicle.objects.select_related("towed_car").get(pk=truck.pk)
+    copied = copy.copy(truck)
+    assert type(copied) is Truck and copied.name == "big" and copied.towed_car == car
+    assert copied._state is not truck._state
+    assert copied._state.fields_cache is not truck._state.fields_cache
+    copied.towed_car = None
+    copied.name = "small"
+    assert truck.towed_car == car and truck.name == "big"
+
+
+@pytest.mark.django_db
+def test_columnar_export(tmp_path, django_assert_num_queries):
+    np = pytest.importorskip("numpy")
+    car = Car.objects.create(name="beetle")
+    SportsCar.objects.create(name="zoom", top_speed=310)
+    Truck.objects.create(name="big", towed_car=car, manual="drive")
+    Truck.objects.create(name="small")
+
+    # one query for the types, one per type, one per chunk for the truck side table
+    with django_assert_num_queries(6):
+        arrays = columnar.to_numpy(Vehicle.objects.order_by("name"), chunk_size=1)
+    assert list(arrays) == [Car, SportsCar, Truck]
+    assert list(arrays[Car]) == ["id", "name", "attributes"]
+    assert arrays[SportsCar]["top_speed"].tolist() == [310.0]
+    assert arrays[SportsCar]["convertible"].dtype == np.dtype("bool")
+    trucks = arrays[Truck]
+    assert trucks["name"].tolist() == ["big", "small"]
+    assert trucks["manual"].tolist() == ["drive", ""]
+    assert trucks["towed_car_id"].tolist()[0] == car.pk
+    assert np.isnan(trucks["towed_car_id"][1])
+
+    paths = columnar.write_npy(Vehicle.objects.all(), tmp_path, fields=["name"], chunk_size=1)
+    loaded = np.load(paths[Truck]["name"], mmap_mode="r")
+    assert isinstance(loaded, np.memmap)
+    assert sorted(loaded.tolist()) == ["big", "small"]
+    with pytest.raises(ValueError):
+        columnar.write_npy(Vehicle.objects.all(), tmp_path)
+    with pytest.raises(FieldDoesNotExist):
+        columnar.to_numpy(Vehicle.objects.all(), fields=["nope"])
+
+
+@pytest.mark.django_db
+def test_arrow_export(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    SportsCar.objects.create(name="zoom", top_speed=310)
+    Truck.objects.create(name="big", manual="drive")
+
+    batches = dict(columnar.iter_record_batches(Vehicle.objects.all(), fields=["top_speed"]))
+    assert batches[SportsCar].schema.names == ["type", "id", "top_speed"]
+    assert batches[Truck].schema.names == ["type", "id"]
+    type_column = batches[SportsCar].column("type")
+    assert type_column.to_pylist() == ["testapp.car/testapp.sportscar/"]
+    # all the batches share a dictionary of every type
+    assert type_column.dictionary == batches[Truck].column("type").dictionary
+
+    paths = columnar.write_arrow(Vehicle.objects.all(), tmp_path)
+    table = pa.ipc.open_file(pa.memory_map(paths[Truck])).read_all()
+    assert table.column("manual").to_pylist() == ["drive"]
@@ -0,0 +1,61 @@
+"""
+A cache of the type of each typed row, so a row's class can be found without loading it.
+
+Each entry is stored with a generation token of its base model (per database). Bulk changes
+(``delete()`` or ``update(type=...)`` on a queryset) replace the token, which invalidates
+every entry of the model with a single cache write, instead of finding the affected rows.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from django.core.cache import BaseCache
+
+from .cache import SettingCache, delete_tokens
+
+if TYPE_CHECKING:
+    from .models import TypedModel
+
+_cache = SettingCache(
+    "TYPEDMODELS_TYPE_CACHE",
+    "typedmodels-types",
+    {"TIMEOUT": 300, "OPTIONS": {"MAX_ENTRIES": 100_000}},
+)
+
+
+def get_type_cache() -> BaseCache:
+    """
+    Returns the cache named by the ``TYPEDMODELS_TYPE_CACHE`` setting, or a process-local
+    in-memory cache (whose entries expire after 5 minutes) if that isn't set.
+    """
+    return _cache.get()
+
+
+def type_cache_in_use() -> bool:
+    """
+    Whether the type cache may have entries (see ``SettingCache.in_use()``).
+    """
+    return _cache.in_use()
+
+
+def type_cache_key(model: "type[TypedModel]", using: str | None, pk: Any) -> str:
+    return f"typedmodels:type:{model._meta.label_lower}:{using}:{pk}"
+
+
+def generation_key(model: "type[TypedModel]", using: str | None) -> str:
+    return f"typedmodels:types:{model._meta.label_lower}:{using}"
+
+
+def forget_type(model: "type[TypedModel]", using: str, pk: Any) -> None:
+    """
+    Drops the cached type of one row of ``model`` (a typed base model).
+    """
+    if type_cache_in_use():
+        delete_tokens(get_type_cache(), [type_cache_key(model, using, pk)], using)
+
+
+def forget_types(model: "type[TypedModel]", using: str) -> None:
+    """
+    Invalidates the cached types of all the rows of ``model`` (a typed base model).
+    """
+    if type_cache_in_use():
+        delete_tokens(get_type_cache(), [generation_key(model, using)], using)